@@ -0,0 +1,399 @@
+"""
+InstaMakaan - Backend Benchmarks
+Seeds a scratch database with synthetic data and times backend code paths.
+
+Usage:
+    cd backend
+    source venv/bin/activate  # On Windows: .\\venv\\Scripts\\activate
+    python benchmark.py dashboard --properties 20000 --inquiries 50000
+    python benchmark.py logins --concurrency 20 --keep
+    python benchmark.py uploads --concurrency 100
+    python benchmark.py nearby  # 100k properties unless --properties is given
+    python benchmark.py serialization  # in-memory, no database needed
+    python benchmark.py bulk  # 10k properties unless --properties is given
+
+Benchmarks that drive the API in-process need httpx (pip install httpx).
+
+The benchmarks use BENCH_DB_NAME (default: instamakaan_bench) so they never
+touch the development database. Pass --keep to reuse previously seeded data.
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timezone, timedelta
+from uuid import uuid4
+
+# Point the app at the scratch database before importing it
+os.environ["DB_NAME"] = os.environ.get("BENCH_DB_NAME", "instamakaan_bench")
+
+import server  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+
+db = server.db
+
+PROPERTY_TYPES = ["rent", "buy", "pre-occupied"]
+INQUIRY_STATUSES = server.INQUIRY_STATUSES
+SECTORS = ["Sector 150", "Sector 128", "Sector 62", "Greater Noida West", "Sector 18"]
+# Rough bounding box of Noida / Greater Noida as (lng, lat)
+GEO_MIN, GEO_MAX = (77.30, 28.42), (77.55, 28.65)
+
+
+def _random_point() -> dict:
+    return {"type": "Point", "coordinates": [random.uniform(GEO_MIN[0], GEO_MAX[0]),
+                                             random.uniform(GEO_MIN[1], GEO_MAX[1])]}
+
+
+def _timestamp(i: int) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(minutes=i)
+
+
+async def seed(owners: int, agents: int, properties: int, inquiries: int, batch_size: int = 5000):
+    """Replace the scratch collections with synthetic documents."""
+    print(f"🌱 Seeding {owners} owners, {agents} agents, {properties} properties, {inquiries} inquiries...")
+    for name in ("owners", "agents", "properties", "inquiries"):
+        await db[name].delete_many({})
+
+    owner_ids = [str(uuid4()) for _ in range(owners)]
+    agent_ids = [str(uuid4()) for _ in range(agents)]
+
+    await db.owners.insert_many([
+        {"id": owner_id, "name": f"Owner {i}", "email": f"owner{i}@example.com", "phone": "+91 90000 00000",
+         "status": "active", "created_at": _timestamp(i), "updated_at": _timestamp(i)}
+        for i, owner_id in enumerate(owner_ids)
+    ])
+    await db.agents.insert_many([
+        {"id": agent_id, "name": f"Agent {i}", "email": f"agent{i}@example.com", "phone": "+91 80000 00000",
+         "designation": "Field Agent", "status": random.choice(["active", "inactive"]),
+         "created_at": _timestamp(i), "updated_at": _timestamp(i)}
+        for i, agent_id in enumerate(agent_ids)
+    ])
+
+    for start in range(0, properties, batch_size):
+        await db.properties.insert_many([
+            {"id": str(uuid4()), "title": f"Property {i}", "property_type": random.choice(PROPERTY_TYPES),
+             "location": f"{random.choice(SECTORS)}, Noida", "sector": random.choice(SECTORS),
+             "price": f"₹{random.randint(8, 80)},000", "price_label": "Full Flat Rent",
+             "description": "Synthetic benchmark property", "beds": random.randint(1, 5),
+             "baths": random.randint(1, 4), "area": f"{random.randint(400, 3000)} sq ft",
+             "status": random.choice(["active", "inactive"]), "owner_id": random.choice(owner_ids),
+             "images": [], "geo": _random_point(), "created_at": _timestamp(i), "updated_at": _timestamp(i)}
+            for i in range(start, min(start + batch_size, properties))
+        ])
+
+    for start in range(0, inquiries, batch_size):
+        await db.inquiries.insert_many([
+            {"id": str(uuid4()), "name": f"Customer {i}", "phone": "+91 70000 00000",
+             "inquiry_type": "general", "status": random.choice(INQUIRY_STATUSES),
+             "assigned_agent_id": random.choice(agent_ids), "log_count": 0, "last_log": None,
+             "created_at": _timestamp(i), "updated_at": _timestamp(i)}
+            for i in range(start, min(start + batch_size, inquiries))
+        ])
+
+    await ensure_indexes(db)
+    print("   ✅ Seeded\n")
+
+
+async def time_async(label: str, func, iterations: int) -> list:
+    """Run func iterations times after one warm-up call and print latency stats in ms."""
+    await func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+    print(f"   {label:<28} mean {statistics.mean(samples):8.2f} ms   "
+          f"p50 {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms")
+    return samples
+
+
+# ============== DASHBOARD ==============
+
+async def legacy_dashboard_stats():
+    """The original sequential implementation of GET /api/dashboard/stats."""
+    await db.properties.count_documents({})
+    await db.properties.count_documents({"status": "active"})
+    await db.inquiries.count_documents({})
+    await db.inquiries.count_documents({"status": "new"})
+    await db.owners.count_documents({})
+    await db.agents.count_documents({"status": "active"})
+    pipeline = [{"$group": {"_id": "$property_type", "count": {"$sum": 1}}}]
+    await db.properties.aggregate(pipeline).to_list(100)
+    await db.inquiries.find({}, {"_id": 0}).sort("created_at", -1).to_list(5)
+
+
+async def uncached_dashboard_stats():
+    """GET /api/dashboard/stats with the response cache emptied first, so the counters are read."""
+    await server.cache.invalidate("dashboard:")
+    return await server.get_dashboard_stats()
+
+
+async def bench_dashboard(args):
+    print("📊 GET /api/dashboard/stats")
+    await server.rebuild_dashboard_counters()
+    await time_async("sequential (before)", legacy_dashboard_stats, args.iterations)
+    await time_async("counters read (after)", uncached_dashboard_stats, args.iterations)
+    await time_async("cached response", server.get_dashboard_stats, args.iterations)
+    await time_async("counters rebuild", server.rebuild_dashboard_counters, args.iterations)
+
+
+# ============== LOGINS ==============
+
+async def bench_logins(args):
+    """Measure property-listing latency while a burst of logins is in flight."""
+    import httpx
+
+    email, password = "bench-login@instamakaan.com", "bench-password"
+    await db.users.delete_many({"email": email})
+    await db.users.insert_one({
+        "id": str(uuid4()), "email": email, "name": "Bench User", "role": "admin",
+        "password_hash": server.pwd_context.hash(password), "status": "active", "linked_id": None,
+        "created_at": _timestamp(0), "updated_at": _timestamp(0)
+    })
+    user = await db.users.find_one({"email": email})
+
+    async def inline_login():
+        # What POST /api/auth/login did before: bcrypt on the event loop
+        found = await db.users.find_one({"email": email})
+        server.pwd_context.verify(password, found["password_hash"])
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as api:
+        async def pooled_login():
+            response = await api.post("/api/auth/login", json={"email": email, "password": password})
+            response.raise_for_status()
+
+        async def probe_while(login) -> list:
+            samples = []
+            logins = asyncio.gather(*(login() for _ in range(args.concurrency)))
+            while not logins.done():
+                start = time.perf_counter()
+                await api.get("/api/properties", params={"limit": 1})
+                samples.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.005)
+            await logins
+            return samples or [0.0]
+
+        await api.get("/api/properties", params={"limit": 1})  # warm the cache
+        print(f"🔐 GET /api/properties latency during {args.concurrency} concurrent logins")
+        for label, login in (("inline bcrypt (before)", inline_login), ("password pool (after)", pooled_login)):
+            samples = await probe_while(login)
+            print(f"   {label:<28} max {max(samples):8.2f} ms   "
+                  f"mean {statistics.mean(samples):8.2f} ms   samples {len(samples)}")
+        print(f"   password pool: {server.password_pool_stats}")
+
+    await db.users.delete_one({"id": user["id"]})
+
+
+# ============== STATIC UPLOADS ==============
+
+async def bench_uploads(args):
+    """Throughput of concurrent /uploads image requests, plain StaticFiles vs UploadStaticFiles."""
+    import httpx
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    from starlette.staticfiles import StaticFiles
+    from static_files import UploadStaticFiles
+
+    filename = f"{'0' * 64}.jpg"
+    path = server.UPLOADS_DIR / filename
+    path.write_bytes(os.urandom(200 * 1024))
+    try:
+        for label, static_app in (("StaticFiles (before)", StaticFiles),
+                                  ("UploadStaticFiles (after)", UploadStaticFiles)):
+            app = Starlette(routes=[Mount("/uploads", static_app(directory=str(server.UPLOADS_DIR)))])
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as api:
+                etag = (await api.get(f"/uploads/{filename}")).headers["etag"]
+                for mode, headers in (("full", {}), ("revalidate", {"If-None-Match": etag})):
+                    total = args.concurrency * args.iterations
+                    start = time.perf_counter()
+                    for _ in range(args.iterations):
+                        responses = await asyncio.gather(*(
+                            api.get(f"/uploads/{filename}", headers=headers) for _ in range(args.concurrency)
+                        ))
+                    elapsed = time.perf_counter() - start
+                    transferred = sum(len(r.content) for r in responses) * args.iterations
+                    print(f"   {label:<28} {mode:<10} {total / elapsed:9.0f} req/s   "
+                          f"{transferred / elapsed / 1e6:8.1f} MB/s")
+        print("   (in-process; run against uvicorn for network-level numbers)")
+    finally:
+        path.unlink(missing_ok=True)
+
+
+# ============== NEARBY ==============
+
+def _haversine_m(a: list, b: list) -> float:
+    lng1, lat1, lng2, lat2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6378100 * math.asin(math.sqrt(h))
+
+
+async def bench_nearby(args):
+    """$geoNear over the 2dsphere index vs scanning every active property in Python."""
+    radius_km, limit = 2, 20
+    center = [(GEO_MIN[0] + GEO_MAX[0]) / 2, (GEO_MIN[1] + GEO_MAX[1]) / 2]
+    bbox = f"{center[0] - 0.02},{center[1] - 0.02},{center[0] + 0.02},{center[1] + 0.02}"
+    total = await db.properties.count_documents({"geo": {"$exists": True}})
+    print(f"📍 Properties within {radius_km} km of {center[1]:.3f},{center[0]:.3f} ({total} with coordinates)")
+
+    async def scan():
+        matches = []
+        async for prop in db.properties.find({"status": "active"}, {"_id": 0, "id": 1, "geo": 1}):
+            distance = _haversine_m(center, prop["geo"]["coordinates"])
+            if distance <= radius_km * 1000:
+                matches.append((distance, prop["id"]))
+        return sorted(matches)[:limit]
+
+    async def radius():
+        return await server.get_nearby_properties(lat=center[1], lng=center[0], radius_km=radius_km, bbox=None,
+                                                  property_type=None, status="active", limit=limit)
+
+    async def box():
+        return await server.get_nearby_properties(lat=None, lng=None, radius_km=radius_km, bbox=bbox,
+                                                  property_type=None, status="active", limit=limit)
+
+    await time_async("python scan (no index)", scan, max(args.iterations // 10, 1))
+    await time_async("$geoNear radius", radius, args.iterations)
+    await time_async("$geoNear bbox", box, args.iterations)
+
+
+# ============== SERIALIZATION ==============
+
+def _property_doc(i: int) -> dict:
+    return {"id": str(uuid4()), "title": f"Property {i}", "property_type": random.choice(PROPERTY_TYPES),
+            "location": f"{random.choice(SECTORS)}, Noida", "sector": random.choice(SECTORS),
+            "price": "₹25,000", "price_label": "Full Flat Rent", "price_value": 25000.0,
+            "description": "Synthetic benchmark property " * 8, "beds": 3, "baths": 2,
+            "area": "1,450 sq ft", "area_sqft": 1450.0, "features": ["Balcony", "Parking", "Lift"],
+            "amenities": ["Gym", "Pool", "Power Backup"], "furnishing": "semi-furnished",
+            "is_managed": True, "status": "active", "owner_id": str(uuid4()), "owner_name": "Owner",
+            "images": [f"/uploads/{uuid4().hex}.jpg" for _ in range(4)], "image_variants": [],
+            "geo": _random_point(), "created_at": _timestamp(i), "updated_at": _timestamp(i)}
+
+
+async def bench_serialization(args):
+    """GET of a 1,000-property page: validate + jsonable_encoder vs pre-validated ORJSON."""
+    import httpx
+    from typing import List
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+
+    docs = [_property_doc(i) for i in range(1000)]
+    legacy_docs = [{**doc, "created_at": doc["created_at"].isoformat(),
+                    "updated_at": doc["updated_at"].isoformat()} for doc in docs]
+
+    app = FastAPI()
+
+    @app.get("/before", response_model=List[server.Property], response_class=JSONResponse)
+    async def before():
+        # ISO strings from the database, converted by hand, then validated by response_model
+        properties = [dict(doc) for doc in legacy_docs]
+        for prop in properties:
+            prop["created_at"] = datetime.fromisoformat(prop["created_at"])
+            prop["updated_at"] = datetime.fromisoformat(prop["updated_at"])
+        return properties
+
+    @app.get("/after", response_model=List[server.Property])
+    async def after():
+        return server.json_response([dict(doc) for doc in docs])
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as api:
+        print(f"🧾 GET of {len(docs)} properties (in-process)")
+        for label, path in (("validate + JSON (before)", "/before"), ("ORJSON passthrough (after)", "/after")):
+            size = len((await api.get(path)).content)
+
+            async def fetch():
+                (await api.get(path)).raise_for_status()
+
+            await time_async(label, fetch, args.iterations)
+            print(f"   {'':<28} body {size / 1024:8.1f} KiB")
+
+
+# ============== BULK ==============
+
+async def bench_bulk(args):
+    """Creating args.properties properties: one create_property call each vs POST /api/properties/bulk."""
+    import httpx
+    import orjson
+
+    def payload(i: int) -> dict:
+        doc = _property_doc(i)
+        for field in ("id", "owner_name", "image_variants", "price_value", "area_sqft", "created_at", "updated_at"):
+            doc.pop(field)
+        doc["title"] = f"Bulk benchmark {i}"
+        return doc
+
+    items = [payload(i) for i in range(args.properties)]
+    print(f"📦 Creating {len(items)} properties")
+
+    start = time.perf_counter()
+    for item in items:
+        await server.create_property(server.PropertyCreate(**item))
+    before = time.perf_counter() - start
+    await db.properties.delete_many({"title": {"$regex": "^Bulk benchmark "}})
+    print(f"   {'create_property each (before)':<28} {before:8.2f} s   {len(items) / before:10.0f} docs/s")
+
+    async def admin():
+        return {"id": "bench", "role": "admin", "is_active": True}
+
+    server.app.dependency_overrides[server.get_current_active_user] = admin
+    body = b"\n".join(orjson.dumps(item) for item in items)
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as api:
+        start = time.perf_counter()
+        response = await api.post("/api/properties/bulk", content=body,
+                                  headers={"content-type": server.NDJSON_MEDIA_TYPE})
+        after = time.perf_counter() - start
+    server.app.dependency_overrides.clear()
+    summary = orjson.loads(response.content.splitlines()[-1])["summary"]
+    await db.properties.delete_many({"title": {"$regex": "^Bulk benchmark "}})
+    await server.rebuild_dashboard_counters()
+    print(f"   {'POST /bulk NDJSON (after)':<28} {after:8.2f} s   {len(items) / after:10.0f} docs/s   "
+          f"created {summary['created']}, errors {summary['errors']}")
+
+
+BENCHMARKS = {
+    "dashboard": bench_dashboard,
+    "logins": bench_logins,
+    "uploads": bench_uploads,
+    "nearby": bench_nearby,
+    "serialization": bench_serialization,
+    "bulk": bench_bulk,
+}
+
+# Benchmarks that need the synthetic database
+SEEDED_BENCHMARKS = {"dashboard", "logins", "nearby"}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="InstaMakaan backend benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--owners", type=int, default=500)
+    parser.add_argument("--agents", type=int, default=200)
+    parser.add_argument("--properties", type=int, help="Default: 100000 for nearby, 10000 for bulk, 20000 otherwise")
+    parser.add_argument("--inquiries", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Reuse the already seeded data")
+    args = parser.parse_args()
+    if args.properties is None:
+        args.properties = {"nearby": 100000, "bulk": 10000}.get(args.benchmark, 20000)
+
+    print(f"\n🔄 Benchmark database: {os.environ['DB_NAME']}\n")
+    if not args.keep and args.benchmark in SEEDED_BENCHMARKS:
+        await seed(args.owners, args.agents, args.properties, args.inquiries)
+    await BENCHMARKS[args.benchmark](args)
+    print()
+    server.client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""
+InstaMakaan - Response cache
+
+Read-through cache for hot endpoints. Keys are namespaced strings such as
+"properties:detail:<id>" so writes can invalidate everything under a prefix.
+
+Backends:
+    memory (default)  In-process LRU with per-entry TTL and a total size bound.
+                      Each uvicorn worker has its own copy; invalidation is
+                      local and the TTL bounds staleness across workers.
+    redis             Shared cache through any Redis-compatible server
+                      (REDIS_URL). Requires the optional `redis` package and
+                      falls back to memory when it is not installed.
+
+Configuration: CACHE_BACKEND, CACHE_TTL_SECONDS, CACHE_MAX_BYTES, REDIS_URL.
+"""
+
+import logging
+import os
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class MemoryCache:
+    """LRU cache bounded by total pickled size, with per-entry expiry"""
+
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + (ttl_seconds or self.ttl_seconds)
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def invalidate(self, prefix: str = ""):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class RedisCache:
+    """Cache stored in a Redis-compatible server; eviction is left to the server"""
+
+    def __init__(self, client, ttl_seconds: float, namespace: str = "instamakaan:cache:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(self.namespace + key)
+        if raw is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return pickle.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        await self.client.set(self.namespace + key, raw, px=int((ttl_seconds or self.ttl_seconds) * 1000))
+
+    async def invalidate(self, prefix: str = ""):
+        keys = [key async for key in self.client.scan_iter(match=f"{self.namespace}{prefix}*")]
+        if keys:
+            await self.client.delete(*keys)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses, "evictions": None}
+
+
+def create_cache():
+    """Build the cache backend selected by the environment"""
+    ttl_seconds = float(os.environ.get('CACHE_TTL_SECONDS', 30))
+    max_bytes = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    if os.environ.get('CACHE_BACKEND', 'memory') == 'redis':
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            logger.warning("CACHE_BACKEND=redis but the redis package is not installed; using memory cache")
+        else:
+            client = redis.from_url(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'))
+            return RedisCache(client, ttl_seconds)
+
+    return MemoryCache(ttl_seconds, max_bytes)
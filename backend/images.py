@@ -0,0 +1,90 @@
+"""
+InstaMakaan - Responsive image variants
+
+Uploaded images are resized into a few WebP variants stored next to the
+original in the uploads directory:
+
+    <stem>.<ext>          original upload
+    <stem>_thumb.webp     320 px on the longest side
+    <stem>_card.webp      800 px
+    <stem>_full.webp      1600 px
+
+Images are never upscaled. Pillow is optional: without it no variants are
+produced and clients keep using the originals.
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - depends on the deployment
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = {"thumb": 320, "card": 800, "full": 1600}
+VARIANT_FORMAT = "webp"
+VARIANT_QUALITY = 80
+
+
+def variant_filename(filename: str, variant: str) -> str:
+    return f"{Path(filename).stem}_{variant}.{VARIANT_FORMAT}"
+
+
+def generate_variants(path: Path) -> dict:
+    """Write every missing variant of the image at path; returns {variant: filename}.
+
+    Blocking (Pillow work), so call it from a worker thread. Returns an empty
+    dict when Pillow is unavailable or the file is not a readable image.
+    """
+    if Image is None:
+        return {}
+
+    filenames = {name: variant_filename(path.name, name) for name in VARIANTS}
+    if all((path.parent / filename).exists() for filename in filenames.values()):
+        return filenames
+
+    try:
+        with Image.open(path) as original:
+            original = ImageOps.exif_transpose(original)
+            if original.mode not in ("RGB", "RGBA"):
+                original = original.convert("RGBA" if "A" in original.getbands() else "RGB")
+            for name, max_side in VARIANTS.items():
+                target = path.parent / filenames[name]
+                if target.exists():
+                    continue
+                resized = original.copy()
+                resized.thumbnail((max_side, max_side), Image.LANCZOS)
+                temp_target = target.with_suffix(".part")
+                resized.save(temp_target, format=VARIANT_FORMAT.upper(), quality=VARIANT_QUALITY, method=4)
+                temp_target.replace(target)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning("Could not generate variants for %s: %s", path.name, e)
+        return {}
+    return filenames
+
+
+def variants_for_url(url: str, uploads_dir: Path) -> Optional[dict]:
+    """Variant URLs for an "/uploads/..." image URL, or None if they are not all on disk yet"""
+    if not url.startswith("/uploads/"):
+        return None
+    filename = url[len("/uploads/"):]
+    entry = {"url": url}
+    for name in VARIANTS:
+        variant = variant_filename(filename, name)
+        if not (uploads_dir / variant).exists():
+            return None
+        entry[name] = f"/uploads/{variant}"
+    return entry
+
+
+def image_variants(images: List[str], uploads_dir: Path) -> List[dict]:
+    """Variant entries for every image in a property's images list that has them"""
+    entries = []
+    for url in images:
+        entry = variants_for_url(url, uploads_dir)
+        if entry:
+            entries.append(entry)
+    return entries
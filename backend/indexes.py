@@ -0,0 +1,189 @@
+"""
+InstaMakaan - MongoDB index definitions
+
+ensure_indexes() runs on app startup and is idempotent: create_index is a
+no-op when an index with the same name and keys already exists.
+index_report() compares the live indexes against INDEXES so drift can be
+spotted from the admin API.
+"""
+
+import logging
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, TEXT, IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+# Case-insensitive comparison for owner emails (queries must pass the same collation to use the index)
+EMAIL_COLLATION = {"locale": "en", "strength": 2}
+
+
+def _id_index() -> IndexModel:
+    return IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+
+
+def _page_index(*prefix: str) -> IndexModel:
+    """Index backing keyset pagination (see find_page in server.py), optionally
+    prefixed by equality-filter fields."""
+    keys = [(field, ASCENDING) for field in prefix] + [("created_at", DESCENDING), ("id", DESCENDING)]
+    return IndexModel(keys, name="_".join(prefix + ("created_at", "id")))
+
+
+# Single-field indexes that are a prefix of a compound index below are left
+# out on purpose (e.g. inquiries.status is served by status_created_at_id).
+INDEXES = {
+    "users": [
+        _id_index(),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        _page_index(),
+    ],
+    "owners": [
+        _id_index(),
+        # Owner lookup by email in CSV imports (see import_csv in server.py)
+        IndexModel([("email", ASCENDING)], name="email_ci", collation=EMAIL_COLLATION),
+        _page_index(),
+        _page_index("status"),
+    ],
+    "agents": [
+        _id_index(),
+        _page_index(),
+        _page_index("status"),
+    ],
+    "properties": [
+        _id_index(),
+        _page_index(),
+        _page_index("status"),
+        IndexModel([("property_type", ASCENDING)], name="property_type"),
+        IndexModel([("owner_id", ASCENDING)], name="owner_id"),
+        IndexModel(
+            [(field, TEXT) for field in ("title", "location", "sector", "description", "features", "amenities")],
+            name="search_text",
+            weights={"title": 10, "location": 5, "sector": 5, "features": 2, "amenities": 2},
+            default_language="english",
+        ),
+        # Range filters and keyset sorting on the parsed numeric fields
+        IndexModel([("price_value", ASCENDING), ("id", ASCENDING)], name="price_value_id"),
+        IndexModel([("area_sqft", ASCENDING), ("id", ASCENDING)], name="area_sqft_id"),
+        # $geoNear for /properties/nearby; documents without geo are not indexed
+        IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+    ],
+    "inquiries": [
+        _id_index(),
+        _page_index(),
+        _page_index("status"),
+        _page_index("assigned_agent_id"),
+        IndexModel([("property_id", ASCENDING)], name="property_id"),
+        IndexModel([("inquiry_type", ASCENDING)], name="inquiry_type"),
+    ],
+    "inquiry_logs": [
+        _id_index(),
+        # GET /inquiries/{id}/logs pages by (timestamp, id) within one inquiry
+        IndexModel([("inquiry_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)],
+                   name="inquiry_id_timestamp_id"),
+    ],
+    "earnings": [
+        _id_index(),
+        _page_index(),
+        _page_index("owner_id"),
+        IndexModel([("property_id", ASCENDING)], name="property_id"),
+        IndexModel([("month", ASCENDING)], name="month"),
+        # One month-close record per property and month (see close_month in server.py)
+        IndexModel([("property_id", ASCENDING), ("month", ASCENDING)], name="property_id_month_close_unique",
+                   unique=True, partialFilterExpression={"source": "month_close"}),
+    ],
+    "earnings_rollups": [
+        _id_index(),
+        IndexModel([("owner_id", ASCENDING), ("month", DESCENDING)], name="owner_id_month"),
+    ],
+    "status_checks": [
+        _id_index(),
+    ],
+    "dashboard_counters": [
+        _id_index(),
+    ],
+}
+
+
+async def ensure_indexes(db) -> dict:
+    """Create every index in INDEXES, returning the names created per collection.
+
+    Failures are logged and skipped so a single bad index (for example a
+    unique index over existing duplicate data) does not block startup.
+    """
+    created = {}
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        created[collection_name] = []
+        for model in models:
+            try:
+                name = await collection.create_indexes([model])
+                created[collection_name].extend(name)
+            except PyMongoError as e:
+                logger.error(
+                    "Failed to create index %s on %s: %s",
+                    model.document["name"], collection_name, e
+                )
+    return created
+
+
+def _expected_key(model: IndexModel) -> dict:
+    """Key of model as list_indexes reports it (text fields collapse into _fts/_ftsx)"""
+    key = dict(model.document["key"])
+    if TEXT not in key.values():
+        return key
+    expected = {field: direction for field, direction in key.items() if direction != TEXT}
+    expected.update({"_fts": TEXT, "_ftsx": 1})
+    return expected
+
+
+def _expected_spec(model: IndexModel) -> dict:
+    """The parts of an index definition compared by index_report"""
+    document = model.document
+    return {
+        "key": _expected_key(model),
+        "unique": bool(document.get("unique", False)),
+        "partialFilterExpression": document.get("partialFilterExpression"),
+        "collation": document.get("collation"),
+    }
+
+
+def _existing_spec(index: dict, expected: dict) -> dict:
+    """_expected_spec of a live index as list_indexes reports it"""
+    collation = index.get("collation")
+    if collation is not None and expected["collation"]:
+        # The server fills in every collation option; compare only the ones INDEXES sets
+        collation = {option: collation.get(option) for option in expected["collation"]}
+    partial = index.get("partialFilterExpression")
+    return {
+        "key": dict(index["key"]),
+        "unique": bool(index.get("unique", False)),
+        "partialFilterExpression": dict(partial) if partial is not None else None,
+        "collation": dict(collation) if collation is not None else None,
+    }
+
+
+async def index_report(db) -> dict:
+    """Report present, missing, mismatched and unexpected indexes for each collection.
+
+    An index is mismatched when its key, uniqueness, partial filter or
+    collation differ from INDEXES.
+    """
+    report = {}
+    for collection_name, models in INDEXES.items():
+        expected = {model.document["name"]: _expected_spec(model) for model in models}
+        existing = {}
+        async for index in db[collection_name].list_indexes():
+            if index["name"] != "_id_":
+                existing[index["name"]] = index
+
+        matching = {
+            name for name in expected
+            if name in existing and _existing_spec(existing[name], expected[name]) == expected[name]
+        }
+        report[collection_name] = {
+            "present": sorted(matching),
+            "missing": sorted(name for name in expected if name not in existing),
+            "mismatched": sorted(name for name in expected if name in existing and name not in matching),
+            "extra": sorted(name for name in existing if name not in expected),
+        }
+    return report
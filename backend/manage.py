@@ -0,0 +1,240 @@
+"""
+InstaMakaan - Management Commands
+Maintenance jobs that run against the configured database (see .env).
+
+Usage:
+    cd backend
+    source venv/bin/activate  # On Windows: .\venv\Scripts\activate
+    python manage.py --help
+    python manage.py reconcile-stats
+"""
+
+import asyncio
+import re
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import typer
+from pymongo import UpdateOne
+
+import server
+
+cli = typer.Typer(help="InstaMakaan management commands", no_args_is_help=True)
+
+
+@cli.callback()
+def main():
+    """InstaMakaan management commands."""
+
+
+def run(coro):
+    """Run a coroutine on a fresh event loop and close the Mongo client afterwards."""
+    async def runner():
+        try:
+            return await coro
+        finally:
+            server.client.close()
+    return asyncio.run(runner())
+
+
+@cli.command("reconcile-stats")
+def reconcile_stats():
+    """Rebuild the materialized dashboard counters and owner earnings rollups."""
+    async def rebuild():
+        return await asyncio.gather(server.rebuild_dashboard_counters(), server.rebuild_earnings_rollups())
+
+    counters, rollups = run(rebuild())
+    for collection in server.COUNTED_FIELDS:
+        typer.echo(f"{collection:<12} {counters[collection]['total']}")
+    typer.echo(f"✅ Dashboard counters rebuilt at {counters['rebuilt_at']}")
+    typer.echo(f"✅ {rollups} owner earnings rollups rebuilt")
+
+
+@cli.command("migrate-earnings-rollups")
+def migrate_earnings_rollups():
+    """Build earnings_rollups from every existing earnings record (required once after upgrading)."""
+    rollups = run(server.rebuild_earnings_rollups())
+    typer.echo(f"✅ {rollups} owner earnings rollups built")
+
+
+@cli.command("backfill-numeric-fields")
+def backfill_numeric_fields(
+    batch_size: int = typer.Option(1000, help="Documents per bulk_write"),
+    force: bool = typer.Option(False, help="Re-parse properties that already have values"),
+):
+    """Parse price and area into price_value / area_sqft for existing properties."""
+    async def backfill():
+        query = {} if force else {"$or": [{"price_value": {"$exists": False}}, {"area_sqft": {"$exists": False}}]}
+        cursor = server.db.properties.find(query, {"_id": 0, "id": 1, "price": 1, "area": 1})
+        scanned = modified = 0
+        batch = []
+
+        async def flush():
+            nonlocal modified
+            if batch:
+                result = await server.db.properties.bulk_write(batch, ordered=False)
+                modified += result.modified_count
+                batch.clear()
+
+        async for prop in cursor:
+            scanned += 1
+            batch.append(UpdateOne({"id": prop["id"]}, {"$set": {
+                "price_value": server.parse_price(prop.get("price")),
+                "area_sqft": server.parse_area(prop.get("area")),
+            }}))
+            if len(batch) >= batch_size:
+                await flush()
+                typer.echo(f"   {scanned} scanned")
+        await flush()
+        return scanned, modified
+
+    scanned, modified = run(backfill())
+    typer.echo(f"✅ Backfilled {modified} of {scanned} properties")
+
+
+@cli.command("migrate-inquiry-logs")
+def migrate_inquiry_logs():
+    """Move conversation_logs embedded in inquiries into the inquiry_logs collection.
+
+    Safe to re-run: log ids are derived from the inquiry id and position, so
+    entries copied before an interruption are not duplicated.
+    """
+    async def migrate():
+        migrated = copied = 0
+        cursor = server.db.inquiries.find(
+            {"conversation_logs": {"$exists": True}}, {"_id": 0, "id": 1, "conversation_logs": 1}
+        )
+        async for inquiry in cursor:
+            inquiry_id = inquiry["id"]
+            logs = [
+                {**entry, "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"{inquiry_id}/{position}")),
+                 "inquiry_id": inquiry_id}
+                for position, entry in enumerate(inquiry.get("conversation_logs") or [])
+            ]
+            if logs:
+                await server.db.inquiry_logs.bulk_write(
+                    [UpdateOne({"id": log["id"]}, {"$setOnInsert": log}, upsert=True) for log in logs],
+                    ordered=False
+                )
+            log_count, last_log = await asyncio.gather(
+                server.db.inquiry_logs.count_documents({"inquiry_id": inquiry_id}),
+                server.db.inquiry_logs.find_one(
+                    {"inquiry_id": inquiry_id}, {"_id": 0}, sort=[("timestamp", -1), ("id", -1)]
+                )
+            )
+            await server.db.inquiries.update_one(
+                {"id": inquiry_id},
+                {"$set": {"log_count": log_count, "last_log": last_log}, "$unset": {"conversation_logs": ""}}
+            )
+            migrated += 1
+            copied += len(logs)
+        await server.cache.invalidate("dashboard:")
+        return migrated, copied
+
+    migrated, copied = run(migrate())
+    typer.echo(f"✅ Moved {copied} logs from {migrated} inquiries into inquiry_logs")
+
+
+# Timestamp fields that older versions stored as ISO-8601 strings
+DATE_FIELDS = {
+    "users": ["created_at", "updated_at"],
+    "owners": ["created_at", "updated_at"],
+    "agents": ["created_at", "updated_at"],
+    "properties": ["created_at", "updated_at"],
+    "inquiries": ["created_at", "updated_at", "last_log.timestamp"],
+    "inquiry_logs": ["timestamp"],
+    "earnings": ["created_at"],
+    "status_checks": ["timestamp"],
+    "dashboard_counters": ["rebuilt_at"],
+}
+
+
+def parse_timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@cli.command("migrate-dates")
+def migrate_dates(batch_size: int = typer.Option(1000, help="Documents per bulk_write")):
+    """Convert string timestamps into native BSON dates so they sort and compare correctly."""
+    async def migrate():
+        converted = {}
+        for collection_name, fields in DATE_FIELDS.items():
+            collection = server.db[collection_name]
+            converted[collection_name] = 0
+            for field in fields:
+                batch = []
+                async for doc in collection.find({field: {"$type": "string"}}, {"_id": 1, field: 1}):
+                    value = doc
+                    for part in field.split("."):
+                        value = value[part]
+                    try:
+                        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {field: parse_timestamp(value)}}))
+                    except ValueError:
+                        typer.echo(f"   ⚠️  {collection_name} {doc['_id']}: unparseable {field} {value!r}")
+                        continue
+                    if len(batch) >= batch_size:
+                        converted[collection_name] += (await collection.bulk_write(batch, ordered=False)).modified_count
+                        batch = []
+                if batch:
+                    converted[collection_name] += (await collection.bulk_write(batch, ordered=False)).modified_count
+        await server.cache.invalidate()
+        return converted
+
+    for collection_name, count in run(migrate()).items():
+        typer.echo(f"{collection_name:<20} {count}")
+
+
+@cli.command("close-month")
+def close_month(
+    month: str = typer.Option(None, help="Month to bill as YYYY-MM (default: current month)"),
+    batch_size: int = typer.Option(1000, help="Records per insert_many"),
+    dry_run: bool = typer.Option(False, help="Count what would be created without writing"),
+):
+    """Create rent earnings records for every managed property with an owner."""
+    month = month or datetime.now().strftime("%Y-%m")
+    if not re.match(server.MONTH_PATTERN, month):
+        raise typer.BadParameter("month must be YYYY-MM")
+
+    def progress(result):
+        typer.echo(f"   {result['created']} created, {result['skipped']} skipped")
+
+    result = run(server.close_month(month, batch_size=batch_size, dry_run=dry_run, on_batch=progress))
+    verb = "Would create" if dry_run else "Created"
+    typer.echo(f"✅ {verb} {result['created']} earnings records for {month} "
+               f"({result['skipped']} already closed) in {result['seconds']}s, "
+               f"{result['records_per_second']} records/s")
+
+
+@cli.command("import-csv")
+def import_csv(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, help="CSV file with a header row"),
+    collection: str = typer.Option("properties", help="properties or owners"),
+    batch_size: int = typer.Option(server.IMPORT_BATCH_SIZE, help="Rows validated and written per bulk_write"),
+    dry_run: bool = typer.Option(False, help="Validate and resolve owners without writing"),
+):
+    """Create properties or owners from a CSV file (columns as in DATA_MODEL.md)."""
+    if collection not in ("properties", "owners"):
+        raise typer.BadParameter("collection must be properties or owners")
+
+    def progress(result):
+        typer.echo(f"   {result['rows']} rows: {result['created']} created, "
+                   f"{result['skipped']} skipped, {result['errors']} errors")
+
+    with path.open("rb") as file:
+        result = run(server.import_csv(collection, server.csv_rows(file), batch_size=batch_size,
+                                       dry_run=dry_run, on_batch=progress))
+    for error in result['error_rows']:
+        typer.echo(f"   row {error['row']}: {error['error']}", err=True)
+    if result['errors'] > len(result['error_rows']):
+        typer.echo(f"   ... and {result['errors'] - len(result['error_rows'])} more errors", err=True)
+    verb = "Would create" if dry_run else "Created"
+    owners = f" and {result['owners_created']} owners" if result['owners_created'] else ""
+    typer.echo(f"✅ {verb} {result['created']} {collection}{owners} from {result['rows']} rows "
+               f"({result['skipped']} skipped, {result['errors']} errors) in {result['seconds']}s, "
+               f"{result['rows_per_second']} rows/s")
+
+
+if __name__ == "__main__":
+    cli()
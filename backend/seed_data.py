@@ -15,6 +15,7 @@ from uuid import uuid4
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 from passlib.context import CryptContext
+from server import parse_area, parse_price
 
 # Load environment variables
 load_dotenv()
@@ -51,7 +52,9 @@ async def seed_database():
     await db.owners.delete_many({})
     await db.agents.delete_many({})
     await db.inquiries.delete_many({})
+    await db.inquiry_logs.delete_many({})
     await db.users.delete_many({})
+    await db.dashboard_counters.delete_many({})  # Rebuilt on the next dashboard load
     print("   Done!\n")
     
     # Create Owners
@@ -64,8 +67,8 @@ async def seed_database():
             "phone": "+91 98765 43210",
             "address": "Sector 150, Noida",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid4()),
@@ -74,8 +77,8 @@ async def seed_database():
             "phone": "+91 87654 32109",
             "address": "Greater Noida West",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid4()),
@@ -84,8 +87,8 @@ async def seed_database():
             "phone": "+91 76543 21098",
             "address": "Sector 128, Noida",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         }
     ]
     await db.owners.insert_many(owners)
@@ -101,8 +104,8 @@ async def seed_database():
             "phone": "+91 99999 88888",
             "designation": "Senior Field Agent",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid4()),
@@ -111,8 +114,8 @@ async def seed_database():
             "phone": "+91 88888 77777",
             "designation": "Property Consultant",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid4()),
@@ -121,8 +124,8 @@ async def seed_database():
             "phone": "+91 77777 66666",
             "designation": "Junior Agent",
             "status": "active",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         }
     ]
     await db.agents.insert_many(agents)
@@ -157,8 +160,8 @@ async def seed_database():
             "amenities": ["Swimming Pool", "Gym", "Club House", "24x7 Security"],
             "owner_id": owners[0]["id"],
             "owner_name": owners[0]["name"],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid4()),
@@ -182,8 +185,8 @@ async def seed_database():
             "amenities": ["24x7 Security", "CCTV", "Kids Play Area", "Jogging Track"],
             "owner_id": owners[1]["id"],
             "owner_name": owners[1]["name"],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid4()),
@@ -210,8 +213,8 @@ async def seed_database():
             "amenities": ["Metro Nearby", "Shopping Mall", "Hospital", "Schools"],
             "owner_id": owners[0]["id"],
             "owner_name": owners[0]["name"],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid4()),
@@ -235,8 +238,8 @@ async def seed_database():
             "amenities": ["Security", "Power Backup", "Water Supply"],
             "owner_id": owners[2]["id"],
             "owner_name": owners[2]["name"],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid4()),
@@ -263,10 +266,14 @@ async def seed_database():
             "amenities": ["Laundry", "House Keeping Available"],
             "owner_id": owners[1]["id"],
             "owner_name": owners[1]["name"],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         }
     ]
+    for prop in properties:
+        # Numeric copies used by the price/area filters and sorts
+        prop["price_value"] = parse_price(prop["price"])
+        prop["area_sqft"] = parse_area(prop["area"])
     await db.properties.insert_many(properties)
     print(f"   ✅ Created {len(properties)} properties")
     
@@ -289,12 +296,12 @@ async def seed_database():
                     "agent_id": agents[0]["id"],
                     "agent_name": agents[0]["name"],
                     "message": "Inquiry received and assigned",
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "timestamp": datetime.now(timezone.utc),
                     "status_change": "assigned"
                 }
             ],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid4()),
@@ -305,8 +312,8 @@ async def seed_database():
             "inquiry_type": "price_inquiry",
             "property_id": properties[1]["id"],
             "status": "new",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid4()),
@@ -323,19 +330,19 @@ async def seed_database():
                     "agent_id": agents[1]["id"],
                     "agent_name": agents[1]["name"],
                     "message": "Inquiry assigned",
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "timestamp": datetime.now(timezone.utc),
                     "status_change": "assigned"
                 },
                 {
                     "agent_id": agents[1]["id"],
                     "agent_name": agents[1]["name"],
                     "message": "Called the customer. Discussed requirements - needs 2 BHK with parking, budget 15-20k.",
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "timestamp": datetime.now(timezone.utc),
                     "status_change": "talked"
                 }
             ],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         {
             "id": str(uuid4()),
@@ -346,12 +353,23 @@ async def seed_database():
             "inquiry_type": "investment",
             "property_id": properties[3]["id"],
             "status": "new",
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         }
     ]
+    # Conversation logs are stored one per document in inquiry_logs
+    inquiry_logs = []
+    for inquiry in inquiries:
+        logs = [
+            {"id": str(uuid4()), "inquiry_id": inquiry["id"], **log}
+            for log in inquiry.pop("conversation_logs", [])
+        ]
+        inquiry["log_count"] = len(logs)
+        inquiry["last_log"] = dict(logs[-1]) if logs else None
+        inquiry_logs.extend(logs)
     await db.inquiries.insert_many(inquiries)
-    print(f"   ✅ Created {len(inquiries)} inquiries")
+    await db.inquiry_logs.insert_many(inquiry_logs)
+    print(f"   ✅ Created {len(inquiries)} inquiries with {len(inquiry_logs)} conversation logs")
     
     # Create Users (Admin, Owner, Agent)
     print("👥 Creating users...")
@@ -365,8 +383,8 @@ async def seed_database():
             "role": "admin",
             "status": "active",
             "linked_id": None,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         # Owner User (linked to first owner - Rajesh Kumar)
         {
@@ -377,8 +395,8 @@ async def seed_database():
             "role": "owner",
             "status": "active",
             "linked_id": owners[0]["id"],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         # Second Owner User (linked to second owner - Priya Sharma)
         {
@@ -389,8 +407,8 @@ async def seed_database():
             "role": "owner",
             "status": "active",
             "linked_id": owners[1]["id"],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         # Agent User (linked to first agent - Amit Singh)
         {
@@ -401,8 +419,8 @@ async def seed_database():
             "role": "agent",
             "status": "active",
             "linked_id": agents[0]["id"],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
         # Second Agent User (linked to second agent - Neha Gupta)
         {
@@ -413,8 +431,8 @@ async def seed_database():
             "role": "agent",
             "status": "active",
             "linked_id": agents[1]["id"],
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc)
         },
     ]
     await db.users.insert_many(users)
@@ -463,7 +481,9 @@ async def clear_database():
     await db.owners.delete_many({})
     await db.agents.delete_many({})
     await db.inquiries.delete_many({})
+    await db.inquiry_logs.delete_many({})
     await db.users.delete_many({})
+    await db.dashboard_counters.delete_many({})
     print("✅ Database cleared!")
     
     client.close()
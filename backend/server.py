@@ -1,19 +1,39 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends, status
+from fastapi import FastAPI, APIRouter, BackgroundTasks, HTTPException, UploadFile, File, Form, Depends, Query, Request, Response, status
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
+from starlette.datastructures import Headers
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError, create_model, field_validator
+from typing import Iterable, List, Literal, Optional
 import uuid
+import json
+import orjson
+import asyncio
+import base64
+import codecs
+import csv
+import hashlib
+import io
+import itertools
+import re
+import tempfile
+import time
 from datetime import datetime, timezone, timedelta
-import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from indexes import EMAIL_COLLATION, ensure_indexes, index_report
+from cache import MISSING, MemoryCache, create_cache
+from images import generate_variants, image_variants
+from static_files import UploadStaticFiles
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -26,34 +46,137 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get('ACCESS_TOKEN_EXPIRE_MINUTES',
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt takes ~100-300 ms of CPU per call, so it runs on a small thread pool
+# (bcrypt releases the GIL) instead of blocking the event loop. The semaphore
+# keeps at most one call per worker thread in flight; the rest wait on it and
+# are reported as queued in /api/admin/metrics. Before Python 3.10 a Semaphore
+# binds to the loop current when it is created, so it is made per running loop
+# (see password_semaphore) rather than at import time.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+password_slots = {"loop": None, "semaphore": None}
+password_pool_stats = {"workers": PASSWORD_HASH_WORKERS, "queued": 0, "running": 0, "peak_queued": 0, "completed": 0}
+
 # Security
 security = HTTPBearer()
 
+# Read-through cache for hot endpoints (see cache.py for configuration)
+cache = create_cache()
+
+# Authenticated user documents keyed by "<user_id>:<token hash>". Always kept
+# in-process since entries hold password hashes; the TTL bounds how long a
+# revocation made on another worker can go unnoticed.
+AUTH_CACHE_TTL_SECONDS = float(os.environ.get('AUTH_CACHE_TTL_SECONDS', 30))
+auth_cache = MemoryCache(AUTH_CACHE_TTL_SECONDS, max_bytes=4 * 1024 * 1024)
+
 # Create uploads directory
 UPLOADS_DIR = ROOT_DIR / 'uploads'
 UPLOADS_DIR.mkdir(exist_ok=True)
 
-# MongoDB connection
+# Upload limits
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+UPLOAD_CONCURRENCY = 4  # Files written at once by /api/upload/multiple
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 10 * 1024 * 1024))
+MAX_UPLOAD_REQUEST_BYTES = int(os.environ.get('MAX_UPLOAD_REQUEST_BYTES', 50 * 1024 * 1024))
+
+# MongoDB connection (timestamps are stored as BSON dates and read back as aware UTC datetimes)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ.get('DB_NAME', 'instamakaan')]
 
+# UTC datetimes are written with a "Z" suffix, like Pydantic does
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+class APIResponse(ORJSONResponse):
+    """ORJSON response rendered with ORJSON_OPTIONS"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
 # Create the main app without a prefix
-app = FastAPI(title="InstaMakaan API")
+app = FastAPI(title="InstaMakaan API", default_response_class=APIResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Mount static files for uploads
-app.mount("/uploads", StaticFiles(directory=str(UPLOADS_DIR)), name="uploads")
+# Mount static files for uploads (immutable, so served with long-lived caching)
+app.mount("/uploads", UploadStaticFiles(directory=str(UPLOADS_DIR)), name="uploads")
 
-# ============== AUTH HELPER FUNCTIONS ==============
+class UploadSizeLimit:
+    """Pure ASGI middleware capping the body of /api/upload* requests at max_bytes.
+
+    A declared Content-Length over the limit is refused before anything is
+    read; otherwise received bytes are counted and the request fails with 413
+    as soon as they cross the limit, which also covers chunked uploads.
+    """
+
+    def __init__(self, app, max_bytes: int, path_prefix: str = "/api/upload"):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefix = path_prefix
+
+    def too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds the {self.max_bytes} byte request limit"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            error = self.too_large()
+            response = JSONResponse(status_code=error.status_code, content={"detail": error.detail})
+            await response(scope, receive, send)
+            return
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the multipart parser; FastAPI re-raises HTTPExceptions as-is
+                    raise self.too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+app.add_middleware(UploadSizeLimit, max_bytes=MAX_UPLOAD_REQUEST_BYTES)
+
+# ============== AUTH HELPER FUNCTIONS ==============
+
+def password_semaphore(loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+    """The password pool semaphore for loop, created on first use in that loop"""
+    if password_slots["loop"] is not loop:
+        password_slots["loop"], password_slots["semaphore"] = loop, asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+    return password_slots["semaphore"]
+
+async def run_password_task(func, *args):
+    """Run a bcrypt call on the password pool, tracking queue depth"""
+    stats = password_pool_stats
+    stats["queued"] += 1
+    stats["peak_queued"] = max(stats["peak_queued"], stats["queued"])
+    loop = asyncio.get_running_loop()
+    async with password_semaphore(loop):
+        stats["queued"] -= 1
+        stats["running"] += 1
+        try:
+            return await loop.run_in_executor(password_executor, func, *args)
+        finally:
+            stats["running"] -= 1
+            stats["completed"] += 1
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await run_password_task(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash(password: str) -> str:
+    return await run_password_task(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -81,11 +204,23 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError:
         raise credentials_exception
     
+    # The signature and expiry are still checked above on every request;
+    # only the user lookup is cached.
+    cache_key = f"{user_id}:{hashlib.sha256(token.encode()).hexdigest()}"
+    user = await auth_cache.get(cache_key)
+    if user is not MISSING:
+        return user
+    
     user = await db.users.find_one({"id": user_id}, {"_id": 0})
     if user is None:
         raise credentials_exception
+    await auth_cache.set(cache_key, user)
     return user
 
+async def invalidate_user_cache(user_id: str):
+    """Forget cached lookups for every token of user_id"""
+    await auth_cache.invalidate(f"{user_id}:")
+
 async def get_current_active_user(current_user: dict = Depends(get_current_user)):
     """Check if user is active"""
     if current_user.get("status") != "active":
@@ -185,8 +320,9 @@ class OwnerDashboardStats(BaseModel):
     active_properties: int
     total_earnings: float
     current_month_earnings: float
+    pending_earnings: float = 0
     properties: List[dict]
-    earnings_history: List[dict]
+    earnings_history: List[dict]  # Per month and status, newest first
 
 # Agent Models
 class AgentBase(BaseModel):
@@ -212,10 +348,24 @@ class Agent(AgentBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     status: str = "active"  # active, inactive
     total_inquiries_handled: int = 0
+    inquiry_status_counts: dict = {}  # Computed per request, not stored
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 # Property Models
+class GeoPoint(BaseModel):
+    """GeoJSON point; coordinates are [longitude, latitude]"""
+    type: Literal["Point"] = "Point"
+    coordinates: List[float] = Field(min_length=2, max_length=2)
+
+    @field_validator("coordinates")
+    @classmethod
+    def check_range(cls, coordinates: List[float]) -> List[float]:
+        lng, lat = coordinates
+        if not (-180 <= lng <= 180 and -90 <= lat <= 90):
+            raise ValueError("coordinates must be [longitude, latitude] within range")
+        return coordinates
+
 class PropertyBase(BaseModel):
     title: str
     property_type: str  # pre-occupied, rent, buy
@@ -238,9 +388,10 @@ class PropertyBase(BaseModel):
     brokerage: Optional[str] = None
     owner_id: Optional[str] = None  # Link to owner
     monthly_rent_amount: Optional[float] = None  # For earnings calculation
+    geo: Optional[GeoPoint] = None  # Map location, enables /properties/nearby
 
 class PropertyCreate(PropertyBase):
-    pass
+    images: List[str] = []
 
 class PropertyUpdate(BaseModel):
     title: Optional[str] = None
@@ -265,19 +416,30 @@ class PropertyUpdate(BaseModel):
     images: Optional[List[str]] = None
     owner_id: Optional[str] = None
     monthly_rent_amount: Optional[float] = None
+    geo: Optional[GeoPoint] = None
 
 class Property(PropertyBase):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     images: List[str] = []
+    image_variants: List[dict] = []  # Resized versions of images, see images.py
+    price_value: Optional[float] = None  # Parsed from price for filtering/sorting
+    area_sqft: Optional[float] = None  # Parsed from area for filtering/sorting
+    owner_name: Optional[str] = None  # Denormalized from owners, not stored
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
-# Conversation Log Model
+class NearbyProperty(Property):
+    distance_m: float  # From the search point, not stored
+
+# Conversation Log Model (stored in inquiry_logs, one document per entry)
 class ConversationLog(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    inquiry_id: str
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    agent_id: str
-    agent_name: str
+    agent_id: Optional[str] = None
+    agent_name: Optional[str] = None
     message: str
     status_change: Optional[str] = None
 
@@ -305,10 +467,19 @@ class Inquiry(InquiryBase):
     status: str = "new"  # new, assigned, talked, visit_scheduled, visit_completed, closed
     assigned_agent_id: Optional[str] = None
     assigned_agent_name: Optional[str] = None
-    conversation_logs: List[dict] = []
+    log_count: int = 0
+    last_log: Optional[dict] = None
+    conversation_logs: List[dict] = []  # Recent logs, attached by GET /inquiries/{id} only
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+INQUIRY_STATUSES = ["new", "assigned", "talked", "visit_scheduled", "visit_completed", "closed"]
+INQUIRY_RECENT_LOGS = 50  # Logs embedded in the GET /inquiries/{id} response
+
+# Inquiries written before logs moved to inquiry_logs may still embed them
+INQUIRY_LIST_PROJECTION = {"_id": 0, "conversation_logs": 0}
+INQUIRY_LIST_FIELDS = [name for name in Inquiry.model_fields if name != "conversation_logs"]
+
 # Earnings Model (for tracking owner earnings)
 class EarningsRecord(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -319,6 +490,7 @@ class EarningsRecord(BaseModel):
     month: str  # Format: "2026-01"
     description: Optional[str] = None
     status: str = "pending"  # pending, paid
+    source: str = "manual"  # manual, month_close
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 # Dashboard Stats
@@ -348,6 +520,383 @@ async def get_agent_by_id(agent_id: str):
     """Get agent document by ID"""
     return await db.agents.find_one({"id": agent_id}, {"_id": 0})
 
+async def attach_names(docs: List[dict], collection, id_field: str, name_field: str) -> List[dict]:
+    """Denormalize names onto docs using one $in query for all distinct ids.
+
+    e.g. attach_names(properties, db.owners, "owner_id", "owner_name")
+    """
+    ids = list({doc[id_field] for doc in docs if doc.get(id_field)})
+    if not ids:
+        return docs
+    names = {}
+    async for item in collection.find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "name": 1}):
+        names[item['id']] = item.get('name')
+    for doc in docs:
+        if doc.get(id_field):
+            doc[name_field] = names.get(doc[id_field])
+    return docs
+
+async def append_inquiry_log(inquiry_id: str, agent: dict, message: str,
+                             status_change: Optional[str] = None, update: Optional[dict] = None):
+    """Insert a conversation log and set the inquiry's log_count/last_log along
+    with any other fields in update."""
+    log = ConversationLog(
+        inquiry_id=inquiry_id,
+        agent_id=agent.get('id'),
+        agent_name=agent.get('name'),
+        message=message,
+        status_change=status_change
+    )
+    doc = log.model_dump()
+    await db.inquiry_logs.insert_one(dict(doc))
+    await db.inquiries.update_one(
+        {"id": inquiry_id},
+        {"$set": {**(update or {}), "last_log": doc}, "$inc": {"log_count": 1}}
+    )
+    return doc
+
+async def get_agent_workloads(agent_ids: List[str]) -> dict:
+    """Count assigned inquiries by status for many agents in one aggregation.
+
+    Returns {agent_id: {status: count}}; agents with no inquiries are absent.
+    """
+    if not agent_ids:
+        return {}
+    pipeline = [
+        {"$match": {"assigned_agent_id": {"$in": agent_ids}}},
+        {"$group": {
+            "_id": {"agent_id": "$assigned_agent_id", "status": "$status"},
+            "count": {"$sum": 1}
+        }}
+    ]
+    workloads = {}
+    async for item in db.inquiries.aggregate(pipeline):
+        agent_counts = workloads.setdefault(item['_id']['agent_id'], {})
+        agent_counts[item['_id'].get('status') or 'unknown'] = item['count']
+    return workloads
+
+def encode_cursor(doc: dict, sort_field: str = "created_at", direction: int = -1) -> str:
+    """Build an opaque pagination cursor from a document's (sort_field, id) sort key and the sort direction"""
+    value = doc.get(sort_field)
+    is_datetime = isinstance(value, datetime)
+    raw = json.dumps([sort_field, direction, serialize_datetime(value), is_datetime, doc['id']])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str, sort_field: str = "created_at", direction: int = -1):
+    """Return the (sort value, id) pair encoded by encode_cursor for sort_field and direction"""
+    try:
+        cursor_field, cursor_direction, value, is_datetime, doc_id = \
+            json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if is_datetime:
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_field != sort_field or cursor_direction != direction:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+    return value, doc_id
+
+async def find_page(collection, query: dict, limit: int, cursor: Optional[str], response: Response,
+                    projection: Optional[dict] = None, sort_field: str = "created_at",
+                    direction: int = -1) -> List[dict]:
+    """Fetch one page ordered by (sort_field, id), newest created_at first by default.
+
+    Uses a keyset range scan rather than skip, so every page costs the same.
+    When more documents remain, the cursor for the next page is returned in
+    the X-Next-Cursor response header.
+    """
+    if cursor:
+        value, doc_id = decode_cursor(cursor, sort_field, direction)
+        beyond = "$lt" if direction < 0 else "$gt"
+        after_cursor = {"$or": [
+            {sort_field: {beyond: value}},
+            {sort_field: value, "id": {beyond: doc_id}}
+        ]}
+        query = {"$and": [query, after_cursor]} if query else after_cursor
+
+    docs = await collection.find(query, projection or {"_id": 0}) \
+        .sort([(sort_field, direction), ("id", direction)]).to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(docs[-1], sort_field, direction)
+    return docs
+
+# A number with an optional currency prefix and the word right after it. Display
+# strings mix in other numbers ("2 BHK ₹15,000", "3 BHK 1500 sq ft"), so the
+# parsers prefer a number tied to a currency or known unit, fall back to a bare
+# number, and skip numbers followed by an unknown unit rather than store them.
+PRICE_RE = re.compile(r"(₹|rs\.?|inr)?\s*(\d+(?:\.\d+)?)\s*([a-z]+)?")
+PRICE_MULTIPLIERS = {"cr": 1e7, "crore": 1e7, "crores": 1e7, "lakh": 1e5, "lakhs": 1e5,
+                     "lac": 1e5, "lacs": 1e5, "l": 1e5, "k": 1e3}
+# Words that may follow a plain rupee amount ("25000 per month", "45000 onwards")
+PRICE_SUFFIXES = {"rupees", "rs", "inr", "per", "pm", "month", "monthly", "onwards", "only", "negotiable", "rent"}
+
+def parse_price(price: Optional[str]) -> Optional[float]:
+    """Numeric rupee value of a display price like "₹25,000", "₹1.2 Cr" or "45 Lakh".
+
+    None when no number can be read as the price (e.g. "2 BHK" alone).
+    """
+    if not price:
+        return None
+    fallback = None
+    for match in PRICE_RE.finditer(price.lower().replace(",", "")):
+        currency, amount, word = match.groups()
+        if word in PRICE_MULTIPLIERS:
+            return float(amount) * PRICE_MULTIPLIERS[word]
+        if currency:
+            return float(amount)
+        if fallback is None and (word is None or word in PRICE_SUFFIXES):
+            fallback = float(amount)
+    return fallback
+
+# A number, an optional "sq"/"square" and the unit word after it
+AREA_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:(sq\b\.?|square\b)\s*)?([a-z]+\d?)?")
+AREA_MULTIPLIERS = {
+    "ft": 1.0, "feet": 1.0, "foot": 1.0,
+    "yd": 9.0, "yds": 9.0, "yard": 9.0, "yards": 9.0, "gaj": 9.0,
+    "m": 10.7639, "m2": 10.7639, "mt": 10.7639, "mts": 10.7639, "mtr": 10.7639, "mtrs": 10.7639,
+    "meter": 10.7639, "meters": 10.7639, "metre": 10.7639, "metres": 10.7639,
+    "acre": 43560.0, "acres": 43560.0,
+}
+
+def parse_area(area: Optional[str]) -> Optional[float]:
+    """Area in square feet from a display value like "1,200 sq ft", "150 sq yd" or "90 sqm".
+
+    A bare number, or one followed only by "sq"/"square", counts as square
+    feet; None when the only numbers carry an unknown unit (e.g. "3 BHK").
+    """
+    if not area:
+        return None
+    fallback = None
+    for match in AREA_RE.finditer(area.lower().replace(",", "")):
+        amount, square, unit = match.groups()
+        if unit is None:
+            if square:
+                return round(float(amount), 2)
+            if fallback is None:
+                fallback = float(amount)
+            continue
+        if not square and unit.startswith("sq") and len(unit) > 2:
+            unit = unit[2:]  # "sqft", "sqm", "sqyd"
+        if unit in AREA_MULTIPLIERS:
+            return round(float(amount) * AREA_MULTIPLIERS[unit], 2)
+    return round(fallback, 2) if fallback is not None else None
+
+def compute_etag(payload) -> str:
+    """Strong ETag over the canonical JSON encoding of a response payload"""
+    body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def conditional_response(request: Request, response: Response, payload) -> Optional[Response]:
+    """Tag the response with payload's ETag.
+
+    Returns a 304 response to send instead of the body when the client's
+    If-None-Match already names this version.
+    """
+    etag = compute_etag(payload)
+    response.headers["ETag"] = etag
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+    ):
+        headers = {name: value for name, value in response.headers.items() if name in ("etag", "x-next-cursor")}
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], always: tuple = ("id",)) -> Optional[List[str]]:
+    """Field names requested with ?fields=a,b,c (plus always), or None for full documents"""
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(always + tuple(requested)))
+
+def fields_projection(names: Iterable[str]) -> dict:
+    return {"_id": 0, **{name: 1 for name in names}}
+
+@lru_cache(maxsize=None)
+def partial_model(model):
+    """Copy of model with every field optional, used to serialize sparse fieldsets"""
+    fields = {name: (Optional[field.annotation], None) for name, field in model.model_fields.items()}
+    return create_model(f"Partial{model.__name__}", __config__=ConfigDict(extra="ignore"), **fields)
+
+def json_response(content, response: Optional[Response] = None) -> Response:
+    """Send documents read from the database as-is, skipping response_model validation.
+
+    Documents are written through the models, so re-validating them on every
+    read only costs time. ETag / X-Next-Cursor headers set on response are kept.
+    """
+    headers = {}
+    if response is not None:
+        headers = {name: value for name, value in response.headers.items() if name in ("etag", "x-next-cursor")}
+    return APIResponse(content, headers=headers)
+
+def sparse_response(response: Response, docs: List[dict], model, names: List[str]) -> Response:
+    """Serialize only the requested fields of docs, bypassing the route's full response_model"""
+    partial = partial_model(model)
+    content = [partial.model_validate(doc).model_dump(include=set(names)) for doc in docs]
+    return json_response(content, response)
+
+async def invalidate_property_cache(property_id: Optional[str] = None):
+    """Drop cached property listings, and the cached detail view of property_id"""
+    await cache.invalidate("properties:list:")
+    if property_id:
+        await cache.invalidate(f"properties:detail:{property_id}")
+
+# ============== DASHBOARD COUNTERS ==============
+
+# Materialized counters behind GET /api/dashboard/stats. Write paths call
+# record_change() with the document before and/or after the write; the
+# counters can drift under concurrent read-then-write races, which
+# rebuild_dashboard_counters() (POST /api/admin/stats/reconcile or
+# `python manage.py reconcile-stats`) corrects. Deltas never create the
+# counters document: until it exists (e.g. right after an upgrade) they are
+# dropped and the first dashboard read builds it from a full recount.
+DASHBOARD_COUNTERS_ID = "global"
+
+COUNTED_FIELDS = {
+    "properties": ["property_type", "status"],
+    "inquiries": ["status"],
+    "owners": ["status"],
+    "agents": ["status"],
+}
+
+def counter_key(value) -> str:
+    """Make a field value safe to use as a counter path segment"""
+    if value is None or value == "":
+        return "unknown"
+    return str(value).replace(".", "_").replace("$", "_")
+
+def counter_changes(collection: str, doc: dict, sign: int) -> dict:
+    changes = {f"{collection}.total": sign}
+    for field in COUNTED_FIELDS[collection]:
+        changes[f"{collection}.by_{field}.{counter_key(doc.get(field))}"] = sign
+    return changes
+
+def add_counter_changes(inc: dict, collection: str, old: Optional[dict] = None, new: Optional[dict] = None) -> dict:
+    """Accumulate into inc the deltas for a created (new), deleted (old) or updated (both) document"""
+    for doc, sign in ((old, -1), (new, 1)):
+        if doc:
+            for path, delta in counter_changes(collection, doc, sign).items():
+                inc[path] = inc.get(path, 0) + delta
+    return inc
+
+async def record_change(collection: str, old: Optional[dict] = None, new: Optional[dict] = None):
+    """Apply the counter deltas for a created (new), deleted (old) or updated (both) document"""
+    await apply_counter_changes(add_counter_changes({}, collection, old, new))
+
+async def apply_counter_changes(inc: dict):
+    inc = {path: delta for path, delta in inc.items() if delta}
+    if inc:
+        await db.dashboard_counters.update_one({"id": DASHBOARD_COUNTERS_ID}, {"$inc": inc})
+    await cache.invalidate("dashboard:")
+
+async def rebuild_dashboard_counters() -> dict:
+    """Recount every counter from scratch with one $facet per collection"""
+    async def count_collection(collection: str) -> dict:
+        fields = COUNTED_FIELDS[collection]
+        pipeline = [{"$facet": {
+            "total": [{"$count": "count"}],
+            **{field: [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}] for field in fields}
+        }}]
+        facets = (await db[collection].aggregate(pipeline).to_list(1))[0]
+        counts = {"total": facets['total'][0]['count'] if facets['total'] else 0}
+        for field in fields:
+            by_value = {}
+            for item in facets[field]:
+                key = counter_key(item['_id'])
+                by_value[key] = by_value.get(key, 0) + item['count']
+            counts[f"by_{field}"] = by_value
+        return counts
+
+    collections = list(COUNTED_FIELDS)
+    results = await asyncio.gather(*(count_collection(name) for name in collections))
+    counters = {"id": DASHBOARD_COUNTERS_ID, **dict(zip(collections, results))}
+    counters['rebuilt_at'] = datetime.now(timezone.utc)
+    await db.dashboard_counters.replace_one({"id": DASHBOARD_COUNTERS_ID}, counters, upsert=True)
+    await cache.invalidate("dashboard:")
+    return counters
+
+# ============== EARNINGS ROLLUPS ==============
+
+# One document per (owner, month) in earnings_rollups with the amount and
+# record count per payment status, so the owner dashboard reads a few small
+# documents instead of every earnings record. Maintained by the earnings write
+# paths and rebuilt by rebuild_earnings_rollups() alongside the counters.
+
+def rollup_id(owner_id: str, month: str) -> str:
+    return f"{owner_id}:{month}"
+
+def rollup_update(owner_id: str, month: str, changes: List[tuple]) -> UpdateOne:
+    """Upsert applying (status, amount, count) deltas to the owner's rollup for month"""
+    inc = {}
+    for earnings_status, amount, count in changes:
+        key = counter_key(earnings_status)
+        inc[f"by_status.{key}.amount"] = inc.get(f"by_status.{key}.amount", 0) + amount
+        inc[f"by_status.{key}.count"] = inc.get(f"by_status.{key}.count", 0) + count
+    return UpdateOne(
+        {"id": rollup_id(owner_id, month)},
+        {"$inc": inc, "$setOnInsert": {"owner_id": owner_id, "month": month}},
+        upsert=True
+    )
+
+async def record_earnings(owner_id: str, month: str, changes: List[tuple]):
+    await db.earnings_rollups.bulk_write([rollup_update(owner_id, month, changes)])
+
+async def record_new_earnings(records: List[dict]):
+    """Add freshly inserted earnings records to the rollups, one upsert per owner and month"""
+    changes = {}
+    for record in records:
+        changes.setdefault((record['owner_id'], record['month']), []).append(
+            (record.get('status'), record.get('amount', 0), 1)
+        )
+    if changes:
+        await db.earnings_rollups.bulk_write(
+            [rollup_update(owner_id, month, items) for (owner_id, month), items in changes.items()],
+            ordered=False
+        )
+
+ROLLUP_REBUILD_BATCH_SIZE = 500
+
+async def rebuild_earnings_rollups() -> int:
+    """Recompute every rollup from earnings; returns the rollup count.
+
+    The $group emits one row per rollup, written in batches as the cursor is
+    read and stamped with this run's rebuild_id. Rollups without the stamp
+    belong to owners or months that no longer have earnings and are removed.
+    """
+    pipeline = [
+        {"$group": {
+            "_id": {"owner_id": "$owner_id", "month": "$month", "status": "$status"},
+            "amount": {"$sum": "$amount"},
+            "count": {"$sum": 1}
+        }},
+        {"$group": {
+            "_id": {"owner_id": "$_id.owner_id", "month": "$_id.month"},
+            "statuses": {"$push": {"status": "$_id.status", "amount": "$amount", "count": "$count"}}
+        }}
+    ]
+    rebuild_id = str(uuid.uuid4())
+    total, writes = 0, []
+    async for row in db.earnings.aggregate(pipeline, allowDiskUse=True):
+        owner_id, month = row['_id'].get('owner_id'), row['_id'].get('month')
+        rollup = {"id": rollup_id(owner_id, month), "owner_id": owner_id, "month": month,
+                  "by_status": {}, "rebuild_id": rebuild_id}
+        for entry in row['statuses']:
+            by_status = rollup['by_status'].setdefault(counter_key(entry.get('status')), {"amount": 0, "count": 0})
+            by_status['amount'] += entry['amount']
+            by_status['count'] += entry['count']
+        writes.append(ReplaceOne({"id": rollup['id']}, rollup, upsert=True))
+        total += 1
+        if len(writes) >= ROLLUP_REBUILD_BATCH_SIZE:
+            await db.earnings_rollups.bulk_write(writes, ordered=False)
+            writes = []
+    if writes:
+        await db.earnings_rollups.bulk_write(writes, ordered=False)
+    await db.earnings_rollups.delete_many({"rebuild_id": {"$ne": rebuild_id}})
+    return total
+
 # ============== ROUTES ==============
 
 @api_router.get("/")
@@ -374,11 +923,11 @@ async def register_user(user_data: UserCreate):
         "email": user_data.email,
         "name": user_data.name,
         "role": user_data.role,
-        "password_hash": get_password_hash(user_data.password),
+        "password_hash": await get_password_hash(user_data.password),
         "status": "active",
         "linked_id": None,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     }
     
     await db.users.insert_one(user)
@@ -411,7 +960,7 @@ async def login_user(credentials: UserLogin):
             detail="Invalid email or password"
         )
     
-    if not verify_password(credentials.password, user["password_hash"]):
+    if not await verify_password(credentials.password, user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -460,24 +1009,30 @@ async def change_password(
     current_user: dict = Depends(get_current_active_user)
 ):
     """Change user password"""
-    if not verify_password(old_password, current_user["password_hash"]):
+    if not await verify_password(old_password, current_user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
-    new_hash = get_password_hash(new_password)
+    new_hash = await get_password_hash(new_password)
     await db.users.update_one(
         {"id": current_user["id"]},
-        {"$set": {"password_hash": new_hash, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"password_hash": new_hash, "updated_at": datetime.now(timezone.utc)}}
     )
+    await invalidate_user_cache(current_user["id"])
     
     return {"message": "Password changed successfully"}
 
 @api_router.get("/auth/users")
-async def get_all_users(current_user: dict = Depends(require_role(["admin"]))):
+async def get_all_users(
+    response: Response,
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(require_role(["admin"]))
+):
     """Get all users (admin only)"""
-    users = await db.users.find({}, {"_id": 0, "password_hash": 0}).to_list(1000)
+    users = await find_page(db.users, {}, limit, cursor, response, {"_id": 0, "password_hash": 0})
     return users
 
 @api_router.post("/auth/users", response_model=UserResponse)
@@ -513,11 +1068,11 @@ async def create_user_by_admin(
         "email": user_data.email,
         "name": user_data.name,
         "role": user_data.role,
-        "password_hash": get_password_hash(user_data.password),
+        "password_hash": await get_password_hash(user_data.password),
         "status": "active",
         "linked_id": linked_id,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     }
     
     await db.users.insert_one(user)
@@ -544,6 +1099,7 @@ async def delete_user(user_id: str, current_user: dict = Depends(require_role(["
     result = await db.users.delete_one({"id": user_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
+    await invalidate_user_cache(user_id)
     
     return {"message": "User deleted successfully"}
 
@@ -553,46 +1109,104 @@ async def create_status_check(input: StatusCheckCreate):
     status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
     doc = status_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
     await db.status_checks.insert_one(doc)
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
     status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
-    for check in status_checks:
-        if isinstance(check['timestamp'], str):
-            check['timestamp'] = datetime.fromisoformat(check['timestamp'])
     return status_checks
 
 # ============== IMAGE UPLOAD ==============
 
+async def save_upload(file: UploadFile) -> str:
+    """Stream an upload to UPLOADS_DIR in chunks, off the event loop.
+
+    The stored file is named after the SHA-256 of its content, so uploading
+    the same image twice keeps a single copy. Raises 413 as soon as the file
+    exceeds MAX_UPLOAD_BYTES; the request as a whole is capped by
+    UploadSizeLimit while it is still being received.
+    """
+    file_extension = file.filename.split('.')[-1].lower() if file.filename and '.' in file.filename else 'jpg'
+    temp_path = UPLOADS_DIR / f".{uuid.uuid4()}.part"
+    digest = hashlib.sha256()
+    size = 0
+
+    def write_chunk(buffer, chunk: bytes):
+        digest.update(chunk)
+        buffer.write(chunk)
+
+    buffer = await asyncio.to_thread(open, temp_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"{file.filename} exceeds the {MAX_UPLOAD_BYTES} byte limit"
+                )
+            await asyncio.to_thread(write_chunk, buffer, chunk)
+    except BaseException:
+        await asyncio.to_thread(buffer.close)
+        temp_path.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(buffer.close)
+
+    unique_filename = f"{digest.hexdigest()}.{file_extension}"
+    file_path = UPLOADS_DIR / unique_filename
+    if file_path.exists():
+        temp_path.unlink()
+    else:
+        os.replace(temp_path, file_path)
+    return unique_filename
+
+async def process_image_variants(filename: str):
+    """Background stage after an upload: build resized variants of the image,
+    then record them on any property that already references it"""
+    variants = await asyncio.to_thread(generate_variants, UPLOADS_DIR / filename)
+    if not variants:
+        return
+    url = f"/uploads/{filename}"
+    entry = {"url": url, **{name: f"/uploads/{variant}" for name, variant in variants.items()}}
+    result = await db.properties.update_many(
+        {"images": url, "image_variants.url": {"$ne": url}},
+        {"$push": {"image_variants": entry}}
+    )
+    if result.modified_count:
+        await cache.invalidate("properties:")  # Listings and the detail view of every updated property
+
 @api_router.post("/upload")
-async def upload_image(file: UploadFile = File(...)):
+async def upload_image(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     try:
-        file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = UPLOADS_DIR / unique_filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        unique_filename = await save_upload(file)
+        background_tasks.add_task(process_image_variants, unique_filename)
         return {"url": f"/uploads/{unique_filename}", "filename": unique_filename}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.post("/upload/multiple")
-async def upload_multiple_images(files: List[UploadFile] = File(...)):
+async def upload_multiple_images(background_tasks: BackgroundTasks, files: List[UploadFile] = File(...)):
+    slots = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+
+    async def save(file: UploadFile) -> str:
+        async with slots:
+            return await save_upload(file)
+
+    tasks = [asyncio.ensure_future(save(file)) for file in files]
     try:
-        urls = []
-        for file in files:
-            file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
-            unique_filename = f"{uuid.uuid4()}.{file_extension}"
-            file_path = UPLOADS_DIR / unique_filename
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            urls.append(f"/uploads/{unique_filename}")
-        return {"urls": urls}
+        filenames = await asyncio.gather(*tasks)
+        for filename in dict.fromkeys(filenames):
+            background_tasks.add_task(process_image_variants, filename)
+        return {"urls": [f"/uploads/{filename}" for filename in filenames]}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        for task in tasks:
+            task.cancel()
 
 # ============== OWNER CRUD ==============
 
@@ -601,36 +1215,45 @@ async def create_owner(owner_data: OwnerCreate):
     owner_dict = owner_data.model_dump()
     owner_obj = Owner(**owner_dict)
     doc = owner_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
     await db.owners.insert_one(doc)
+    await record_change("owners", new=doc)
     return owner_obj
 
 @api_router.get("/owners")
-async def get_owners(status: Optional[str] = None, limit: int = 100):
+async def get_owners(
+    response: Response,
+    status: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
     query = {}
     if status:
         query['status'] = status
-    owners = await db.owners.find(query, {"_id": 0}).to_list(limit)
+    names = parse_fields(fields, [*Owner.model_fields, "property_count"], always=("id", "created_at"))
+    owners = await find_page(db.owners, query, limit, cursor, response,
+                             projection=fields_projection(names) if names else None)
+
+    # Count properties for every owner on the page in one grouped query
+    property_counts = {}
+    if not names or "property_count" in names:
+        pipeline = [
+            {"$match": {"owner_id": {"$in": [owner['id'] for owner in owners]}}},
+            {"$group": {"_id": "$owner_id", "count": {"$sum": 1}}}
+        ]
+        counts = await db.properties.aggregate(pipeline).to_list(None)
+        property_counts = {item['_id']: item['count'] for item in counts}
+
     for owner in owners:
-        if isinstance(owner.get('created_at'), str):
-            owner['created_at'] = datetime.fromisoformat(owner['created_at'])
-        if isinstance(owner.get('updated_at'), str):
-            owner['updated_at'] = datetime.fromisoformat(owner['updated_at'])
-        # Count properties assigned to this owner
-        property_count = await db.properties.count_documents({"owner_id": owner['id']})
-        owner['property_count'] = property_count
-    return owners
+        if not names or "property_count" in names:
+            owner['property_count'] = property_counts.get(owner['id'], 0)
+    return json_response(owners, response)
 
 @api_router.get("/owners/{owner_id}", response_model=Owner)
 async def get_owner(owner_id: str):
     owner = await db.owners.find_one({"id": owner_id}, {"_id": 0})
     if not owner:
         raise HTTPException(status_code=404, detail="Owner not found")
-    if isinstance(owner.get('created_at'), str):
-        owner['created_at'] = datetime.fromisoformat(owner['created_at'])
-    if isinstance(owner.get('updated_at'), str):
-        owner['updated_at'] = datetime.fromisoformat(owner['updated_at'])
     return owner
 
 @api_router.put("/owners/{owner_id}", response_model=Owner)
@@ -639,63 +1262,81 @@ async def update_owner(owner_id: str, owner_update: OwnerUpdate):
     if not existing:
         raise HTTPException(status_code=404, detail="Owner not found")
     update_data = owner_update.model_dump(exclude_unset=True)
-    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    update_data['updated_at'] = datetime.now(timezone.utc)
     await db.owners.update_one({"id": owner_id}, {"$set": update_data})
     updated = await db.owners.find_one({"id": owner_id}, {"_id": 0})
-    if isinstance(updated.get('created_at'), str):
-        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
-    if isinstance(updated.get('updated_at'), str):
-        updated['updated_at'] = datetime.fromisoformat(updated['updated_at'])
+    await record_change("owners", old=existing, new=updated)
+    await invalidate_property_cache()  # Listings carry owner_name
     return updated
 
 @api_router.delete("/owners/{owner_id}")
 async def delete_owner(owner_id: str):
-    result = await db.owners.delete_one({"id": owner_id})
-    if result.deleted_count == 0:
+    deleted = await db.owners.find_one_and_delete({"id": owner_id}, {"_id": 0})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Owner not found")
+    await record_change("owners", old=deleted)
+    await invalidate_property_cache()
     return {"message": "Owner deleted successfully"}
 
 # Owner Dashboard
+EARNINGS_HISTORY_MONTHS = 6
+
 @api_router.get("/owners/{owner_id}/dashboard")
-async def get_owner_dashboard(owner_id: str):
-    owner = await db.owners.find_one({"id": owner_id}, {"_id": 0})
+async def get_owner_dashboard(owner_id: str, request: Request, response: Response):
+    current_month = datetime.now().strftime("%Y-%m")
+    # Earnings come from the monthly rollups: totals are summed in the database
+    # and only the last few months are returned, however long the history is
+    rollup_pipeline = [
+        {"$match": {"owner_id": owner_id}},
+        {"$sort": {"month": -1}},
+        {"$facet": {
+            "totals": [{"$group": {
+                "_id": None,
+                "paid": {"$sum": "$by_status.paid.amount"},
+                "pending": {"$sum": "$by_status.pending.amount"}
+            }}],
+            "current": [{"$match": {"month": current_month}}, {"$project": {"_id": 0, "by_status": 1}}],
+            "recent": [{"$limit": EARNINGS_HISTORY_MONTHS}, {"$project": {"_id": 0, "month": 1, "by_status": 1}}]
+        }}
+    ]
+    owner, properties, rollups = await asyncio.gather(
+        db.owners.find_one({"id": owner_id}, {"_id": 0}),
+        db.properties.find({"owner_id": owner_id}, {"_id": 0}).to_list(100),
+        db.earnings_rollups.aggregate(rollup_pipeline).to_list(1)
+    )
     if not owner:
         raise HTTPException(status_code=404, detail="Owner not found")
     
-    # Get owner's properties
-    properties = await db.properties.find({"owner_id": owner_id}, {"_id": 0}).to_list(100)
     total_properties = len(properties)
     active_properties = len([p for p in properties if p.get('status') == 'active'])
     
-    # Get earnings
-    earnings = await db.earnings.find({"owner_id": owner_id}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    total_earnings = sum(e.get('amount', 0) for e in earnings if e.get('status') == 'paid')
+    rollups = rollups[0]
+    totals = rollups['totals'][0] if rollups['totals'] else {}
+    current = rollups['current'][0]['by_status'] if rollups['current'] else {}
     
-    # Current month earnings
-    current_month = datetime.now().strftime("%Y-%m")
-    current_month_earnings = sum(
-        e.get('amount', 0) for e in earnings 
-        if e.get('month') == current_month and e.get('status') == 'paid'
-    )
-    
-    # Earnings history (last 6 months)
+    # Earnings history (last 6 months), one entry per payment status
     earnings_history = []
-    for e in earnings[:6]:
-        earnings_history.append({
-            "month": e.get('month'),
-            "amount": e.get('amount'),
-            "status": e.get('status')
-        })
+    for rollup in rollups['recent']:
+        for earnings_status, summary in rollup['by_status'].items():
+            if summary.get('count'):
+                earnings_history.append({
+                    "month": rollup['month'],
+                    "status": earnings_status,
+                    "amount": summary.get('amount', 0),
+                    "count": summary['count']
+                })
     
-    return {
+    dashboard = {
         "owner": owner,
         "total_properties": total_properties,
         "active_properties": active_properties,
-        "total_earnings": total_earnings,
-        "current_month_earnings": current_month_earnings,
+        "total_earnings": totals.get('paid', 0),
+        "current_month_earnings": current.get('paid', {}).get('amount', 0),
+        "pending_earnings": totals.get('pending', 0),
         "properties": properties,
         "earnings_history": earnings_history
     }
+    return conditional_response(request, response, dashboard) or json_response(dashboard, response)
 
 # ============== AGENT CRUD ==============
 
@@ -703,37 +1344,43 @@ async def get_owner_dashboard(owner_id: str):
 async def create_agent(agent_data: AgentCreate):
     agent_dict = agent_data.model_dump()
     agent_obj = Agent(**agent_dict)
-    doc = agent_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
+    doc = agent_obj.model_dump(exclude={"inquiry_status_counts"})
     await db.agents.insert_one(doc)
+    await record_change("agents", new=doc)
     return agent_obj
 
 @api_router.get("/agents", response_model=List[Agent])
-async def get_agents(status: Optional[str] = None, limit: int = 100):
+async def get_agents(
+    response: Response,
+    status: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
     query = {}
     if status:
         query['status'] = status
-    agents = await db.agents.find(query, {"_id": 0}).to_list(limit)
-    for agent in agents:
-        if isinstance(agent.get('created_at'), str):
-            agent['created_at'] = datetime.fromisoformat(agent['created_at'])
-        if isinstance(agent.get('updated_at'), str):
-            agent['updated_at'] = datetime.fromisoformat(agent['updated_at'])
-        # Count assigned inquiries
-        inquiry_count = await db.inquiries.count_documents({"assigned_agent_id": agent['id']})
-        agent['total_inquiries_handled'] = inquiry_count
-    return agents
+    names = parse_fields(fields, Agent.model_fields, always=("id", "created_at"))
+    agents = await find_page(db.agents, query, limit, cursor, response,
+                             projection=fields_projection(names) if names else None)
+    with_workload = not names or bool({"total_inquiries_handled", "inquiry_status_counts"} & set(names))
+    workloads = await get_agent_workloads([agent['id'] for agent in agents]) if with_workload else {}
+    if with_workload:
+        for agent in agents:
+            workload = workloads.get(agent['id'], {})
+            agent['total_inquiries_handled'] = sum(workload.values())
+            agent['inquiry_status_counts'] = {
+                inquiry_status: workload.get(inquiry_status, 0) for inquiry_status in INQUIRY_STATUSES
+            }
+    if names:
+        return sparse_response(response, agents, Agent, names)
+    return json_response(agents, response)
 
 @api_router.get("/agents/{agent_id}", response_model=Agent)
 async def get_agent(agent_id: str):
     agent = await db.agents.find_one({"id": agent_id}, {"_id": 0})
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
-    if isinstance(agent.get('created_at'), str):
-        agent['created_at'] = datetime.fromisoformat(agent['created_at'])
-    if isinstance(agent.get('updated_at'), str):
-        agent['updated_at'] = datetime.fromisoformat(agent['updated_at'])
     return agent
 
 @api_router.put("/agents/{agent_id}", response_model=Agent)
@@ -742,30 +1389,34 @@ async def update_agent(agent_id: str, agent_update: AgentUpdate):
     if not existing:
         raise HTTPException(status_code=404, detail="Agent not found")
     update_data = agent_update.model_dump(exclude_unset=True)
-    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    update_data['updated_at'] = datetime.now(timezone.utc)
     await db.agents.update_one({"id": agent_id}, {"$set": update_data})
     updated = await db.agents.find_one({"id": agent_id}, {"_id": 0})
-    if isinstance(updated.get('created_at'), str):
-        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
-    if isinstance(updated.get('updated_at'), str):
-        updated['updated_at'] = datetime.fromisoformat(updated['updated_at'])
+    await record_change("agents", old=existing, new=updated)
     return updated
 
 @api_router.delete("/agents/{agent_id}")
 async def delete_agent(agent_id: str):
-    result = await db.agents.delete_one({"id": agent_id})
-    if result.deleted_count == 0:
+    deleted = await db.agents.find_one_and_delete({"id": agent_id}, {"_id": 0})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Agent not found")
+    await record_change("agents", old=deleted)
     return {"message": "Agent deleted successfully"}
 
 # Agent Dashboard - Get agent's assigned inquiries
 @api_router.get("/agents/{agent_id}/inquiries")
-async def get_agent_inquiries(agent_id: str):
+async def get_agent_inquiries(
+    agent_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated inquiry fields to return")
+):
     agent = await db.agents.find_one({"id": agent_id}, {"_id": 0})
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    inquiries = await db.inquiries.find({"assigned_agent_id": agent_id}, {"_id": 0}).sort("created_at", -1).to_list(100)
+    names = parse_fields(fields, INQUIRY_LIST_FIELDS, always=("id", "status"))
+    projection = fields_projection(names) if names else INQUIRY_LIST_PROJECTION
+    inquiries = await db.inquiries.find({"assigned_agent_id": agent_id}, projection) \
+        .sort("created_at", -1).to_list(100)
     
     # Count by status
     status_counts = {}
@@ -773,85 +1424,277 @@ async def get_agent_inquiries(agent_id: str):
         status = inquiry.get('status', 'unknown')
         status_counts[status] = status_counts.get(status, 0) + 1
     
-    return {
+    return json_response({
         "agent": agent,
         "total_inquiries": len(inquiries),
         "status_counts": status_counts,
         "inquiries": inquiries
-    }
+    })
 
 # ============== PROPERTY CRUD ==============
 
+def new_property(property_dict: dict):
+    """Property model and stored document (with derived fields) for a PropertyCreate dump"""
+    property_dict['price_value'] = parse_price(property_dict['price'])
+    property_dict['area_sqft'] = parse_area(property_dict['area'])
+    property_obj = Property(**property_dict)
+    doc = property_obj.model_dump(exclude={"owner_name"})
+    doc['image_variants'] = image_variants(doc['images'], UPLOADS_DIR)
+    return property_obj, doc
+
+def property_update_fields(update_data: dict) -> dict:
+    """$set fields for a PropertyUpdate dump, with the derived fields kept in step"""
+    if update_data.get('images') is not None:
+        update_data['image_variants'] = image_variants(update_data['images'], UPLOADS_DIR)
+    if 'price' in update_data:
+        update_data['price_value'] = parse_price(update_data['price'])
+    if 'area' in update_data:
+        update_data['area_sqft'] = parse_area(update_data['area'])
+    update_data['updated_at'] = datetime.now(timezone.utc)
+    return update_data
+
 @api_router.post("/properties", response_model=Property)
 async def create_property(property_data: PropertyCreate):
-    property_dict = property_data.model_dump()
-    property_obj = Property(**property_dict)
-    doc = property_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
+    property_obj, doc = new_property(property_data.model_dump())
     await db.properties.insert_one(doc)
+    await record_change("properties", new=doc)
+    await invalidate_property_cache()
     return property_obj
 
+PROPERTY_SORTS = {
+    "newest": ("created_at", -1),
+    "price_asc": ("price_value", 1),
+    "price_desc": ("price_value", -1),
+    "area_asc": ("area_sqft", 1),
+    "area_desc": ("area_sqft", -1),
+}
+
+def property_list_query(property_type: Optional[str], status: Optional[str], owner_id: Optional[str],
+                        min_price: Optional[float], max_price: Optional[float],
+                        min_area: Optional[float], max_area: Optional[float], sort_field: str) -> dict:
+    """Filter shared by GET /properties and the properties export"""
+    query = {}
+    if property_type:
+        query['property_type'] = property_type
+    if status:
+        query['status'] = status
+    if owner_id:
+        query['owner_id'] = owner_id
+    for field, low, high in (("price_value", min_price, max_price), ("area_sqft", min_area, max_area)):
+        bounds = {"$ne": None} if field == sort_field else {}
+        if low is not None:
+            bounds['$gte'] = low
+        if high is not None:
+            bounds['$lte'] = high
+        if bounds:
+            query[field] = bounds
+    return query
+
 @api_router.get("/properties", response_model=List[Property])
 async def get_properties(
+    request: Request,
+    response: Response,
     property_type: Optional[str] = None,
     status: Optional[str] = None,
     owner_id: Optional[str] = None,
-    limit: int = 100
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_area: Optional[float] = None,
+    max_area: Optional[float] = None,
+    sort: str = Query("newest", pattern="^(" + "|".join(PROPERTY_SORTS) + ")$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
 ):
+    """List properties. Sorting by price or area only returns listings whose
+    price_value / area_sqft could be parsed.
+
+    fields=id,title,... returns only those fields (plus id and the sort key).
+    """
+    sort_field, direction = PROPERTY_SORTS[sort]
+    query = property_list_query(property_type, status, owner_id, min_price, max_price, min_area, max_area, sort_field)
+    names = parse_fields(fields, Property.model_fields, always=("id", sort_field))
+    projection = None
+    if names:
+        projection = fields_projection(names + ["owner_id"] if "owner_name" in names else names)
+    
+    cache_key = "properties:list:" + json.dumps(
+        [property_type, status, owner_id, min_price, max_price, min_area, max_area, sort, names, limit, cursor]
+    )
+    cached = await cache.get(cache_key)
+    if cached is not MISSING:
+        properties, next_cursor = cached
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return conditional_response(request, response, cached) or \
+            (sparse_response(response, properties, Property, names) if names else json_response(properties, response))
+    
+    properties = await find_page(db.properties, query, limit, cursor, response, projection=projection,
+                                 sort_field=sort_field, direction=direction)
+    
+    # Add owner names for the whole page in one query
+    if not names or "owner_name" in names:
+        await attach_names(properties, db.owners, "owner_id", "owner_name")
+    
+    page = (properties, response.headers.get("X-Next-Cursor"))
+    await cache.set(cache_key, page)
+    return conditional_response(request, response, page) or \
+        (sparse_response(response, properties, Property, names) if names else json_response(properties, response))
+
+NEARBY_MAX_RADIUS_KM = 50
+
+@api_router.get("/properties/nearby", response_model=List[NearbyProperty])
+async def get_nearby_properties(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(5, gt=0, le=NEARBY_MAX_RADIUS_KM),
+    bbox: Optional[str] = Query(None, description="min_lng,min_lat,max_lng,max_lat"),
+    property_type: Optional[str] = None,
+    status: Optional[str] = "active",
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Properties with coordinates, nearest first.
+
+    Pass lat/lng for a radius search, or bbox for everything inside a bounding
+    box, ordered by distance from lat/lng when given and from the box centre
+    otherwise. Box edges are geodesics, which is exact enough at city scale.
+    """
     query = {}
     if property_type:
         query['property_type'] = property_type
     if status:
         query['status'] = status
-    if owner_id:
-        query['owner_id'] = owner_id
-    
-    properties = await db.properties.find(query, {"_id": 0}).to_list(limit)
-    
-    for prop in properties:
-        if isinstance(prop.get('created_at'), str):
-            prop['created_at'] = datetime.fromisoformat(prop['created_at'])
-        if isinstance(prop.get('updated_at'), str):
-            prop['updated_at'] = datetime.fromisoformat(prop['updated_at'])
-        # Add owner name if owner_id exists
-        if prop.get('owner_id'):
-            owner = await get_owner_by_id(prop['owner_id'])
-            prop['owner_name'] = owner.get('name') if owner else None
-    
-    return properties
+
+    max_distance = None
+    if bbox:
+        try:
+            min_lng, min_lat, max_lng, max_lat = (float(value) for value in bbox.split(","))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="bbox must be min_lng,min_lat,max_lng,max_lat")
+        if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+            raise HTTPException(status_code=400, detail="Invalid bbox")
+        query['geo'] = {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [[
+            [min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat], [min_lng, max_lat], [min_lng, min_lat]
+        ]]}}}
+        if lat is None or lng is None:
+            lat, lng = (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+    elif lat is None or lng is None:
+        raise HTTPException(status_code=400, detail="Provide lat and lng, or bbox")
+    else:
+        max_distance = radius_km * 1000
+
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [lng, lat]},
+        "distanceField": "distance_m",
+        "spherical": True,
+        "query": query,
+    }
+    if max_distance:
+        geo_near['maxDistance'] = max_distance
+    pipeline = [{"$geoNear": geo_near}, {"$limit": limit}, {"$project": {"_id": 0}}]
+    properties = await db.properties.aggregate(pipeline).to_list(limit)
+
+    return json_response(await attach_names(properties, db.owners, "owner_id", "owner_name"))
+
+SEARCH_FACETS = ["sector", "furnishing", "property_type", "gender_preference"]
+
+@api_router.get("/properties/search")
+async def search_properties(
+    q: Optional[str] = None,
+    property_type: Optional[str] = None,
+    status: Optional[str] = "active",
+    sector: Optional[str] = None,
+    furnishing: Optional[str] = None,
+    gender_preference: Optional[str] = None,
+    min_beds: Optional[int] = None,
+    max_beds: Optional[int] = None,
+    min_baths: Optional[int] = None,
+    max_baths: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_area: Optional[float] = None,
+    max_area: Optional[float] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000)
+):
+    """Full-text property search with range filters and facet counts in one aggregation"""
+    query = {}
+    if q:
+        query['$text'] = {"$search": q}
+    for field, value in (("property_type", property_type), ("status", status), ("sector", sector),
+                         ("furnishing", furnishing), ("gender_preference", gender_preference)):
+        if value:
+            query[field] = value
+    for field, low, high in (("beds", min_beds, max_beds), ("baths", min_baths, max_baths),
+                             ("price_value", min_price, max_price), ("area_sqft", min_area, max_area)):
+        bounds = {}
+        if low is not None:
+            bounds['$gte'] = low
+        if high is not None:
+            bounds['$lte'] = high
+        if bounds:
+            query[field] = bounds
+
+    if q:
+        order = {"score": {"$meta": "textScore"}, "created_at": -1, "id": -1}
+    else:
+        order = {"created_at": -1, "id": -1}
+    pipeline = [
+        {"$match": query},
+        {"$facet": {
+            "results": [{"$sort": order}, {"$skip": offset}, {"$limit": limit}, {"$project": {"_id": 0}}],
+            "total": [{"$count": "count"}],
+            **{field: [
+                {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ] for field in SEARCH_FACETS}
+        }}
+    ]
+    facets = (await db.properties.aggregate(pipeline).to_list(1))[0]
+
+    results = await attach_names(facets['results'], db.owners, "owner_id", "owner_name")
+    return json_response({
+        "results": results,
+        "total": facets['total'][0]['count'] if facets['total'] else 0,
+        "limit": limit,
+        "offset": offset,
+        "facets": {
+            field: {item['_id']: item['count'] for item in facets[field] if item['_id']}
+            for field in SEARCH_FACETS
+        }
+    })
 
 @api_router.get("/properties/{property_id}", response_model=Property)
-async def get_property(property_id: str):
+async def get_property(property_id: str, request: Request, response: Response):
+    cache_key = f"properties:detail:{property_id}"
+    cached = await cache.get(cache_key)
+    if cached is not MISSING:
+        return conditional_response(request, response, cached) or json_response(cached, response)
     property_doc = await db.properties.find_one({"id": property_id}, {"_id": 0})
     if not property_doc:
         raise HTTPException(status_code=404, detail="Property not found")
-    if isinstance(property_doc.get('created_at'), str):
-        property_doc['created_at'] = datetime.fromisoformat(property_doc['created_at'])
-    if isinstance(property_doc.get('updated_at'), str):
-        property_doc['updated_at'] = datetime.fromisoformat(property_doc['updated_at'])
-    return property_doc
+    await cache.set(cache_key, property_doc)
+    return conditional_response(request, response, property_doc) or json_response(property_doc, response)
 
 @api_router.put("/properties/{property_id}", response_model=Property)
 async def update_property(property_id: str, property_update: PropertyUpdate):
     existing = await db.properties.find_one({"id": property_id})
     if not existing:
         raise HTTPException(status_code=404, detail="Property not found")
-    update_data = property_update.model_dump(exclude_unset=True)
-    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    update_data = property_update_fields(property_update.model_dump(exclude_unset=True))
     await db.properties.update_one({"id": property_id}, {"$set": update_data})
     updated = await db.properties.find_one({"id": property_id}, {"_id": 0})
-    if isinstance(updated.get('created_at'), str):
-        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
-    if isinstance(updated.get('updated_at'), str):
-        updated['updated_at'] = datetime.fromisoformat(updated['updated_at'])
+    await record_change("properties", old=existing, new=updated)
+    await invalidate_property_cache(property_id)
     return updated
 
 @api_router.delete("/properties/{property_id}")
 async def delete_property(property_id: str):
-    result = await db.properties.delete_one({"id": property_id})
-    if result.deleted_count == 0:
+    deleted = await db.properties.find_one_and_delete({"id": property_id}, {"_id": 0})
+    if not deleted:
         raise HTTPException(status_code=404, detail="Property not found")
+    await record_change("properties", old=deleted)
+    await invalidate_property_cache(property_id)
     return {"message": "Property deleted successfully"}
 
 @api_router.post("/properties/{property_id}/images")
@@ -863,8 +1706,13 @@ async def add_property_images(property_id: str, image_urls: List[str]):
     updated_images = current_images + image_urls
     await db.properties.update_one(
         {"id": property_id},
-        {"$set": {"images": updated_images, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {
+            "images": updated_images,
+            "image_variants": image_variants(updated_images, UPLOADS_DIR),
+            "updated_at": datetime.now(timezone.utc)
+        }}
     )
+    await invalidate_property_cache(property_id)
     return {"message": "Images added successfully", "images": updated_images}
 
 # ============== INQUIRY CRUD ==============
@@ -873,20 +1721,14 @@ async def add_property_images(property_id: str, image_urls: List[str]):
 async def create_inquiry(inquiry_data: InquiryCreate):
     inquiry_dict = inquiry_data.model_dump()
     inquiry_obj = Inquiry(**inquiry_dict)
-    doc = inquiry_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
+    doc = inquiry_obj.model_dump(exclude={"conversation_logs"})  # Logs live in inquiry_logs
     await db.inquiries.insert_one(doc)
+    await record_change("inquiries", new=doc)
     return inquiry_obj
 
-@api_router.get("/inquiries", response_model=List[Inquiry])
-async def get_inquiries(
-    status: Optional[str] = None,
-    inquiry_type: Optional[str] = None,
-    assigned_agent_id: Optional[str] = None,
-    unassigned: Optional[bool] = None,
-    limit: int = 100
-):
+def inquiry_list_query(status: Optional[str], inquiry_type: Optional[str],
+                       assigned_agent_id: Optional[str], unassigned: Optional[bool]) -> dict:
+    """Filter shared by GET /inquiries and the inquiries export"""
     query = {}
     if status:
         query['status'] = status
@@ -896,42 +1738,74 @@ async def get_inquiries(
         query['assigned_agent_id'] = assigned_agent_id
     if unassigned:
         query['assigned_agent_id'] = None
+    return query
+
+@api_router.get("/inquiries", response_model=List[Inquiry])
+async def get_inquiries(
+    response: Response,
+    status: Optional[str] = None,
+    inquiry_type: Optional[str] = None,
+    assigned_agent_id: Optional[str] = None,
+    unassigned: Optional[bool] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    query = inquiry_list_query(status, inquiry_type, assigned_agent_id, unassigned)
+    names = parse_fields(fields, INQUIRY_LIST_FIELDS, always=("id", "created_at"))
+    inquiries = await find_page(db.inquiries, query, limit, cursor, response,
+                                projection=fields_projection(names) if names else INQUIRY_LIST_PROJECTION)
     
-    inquiries = await db.inquiries.find(query, {"_id": 0}).sort("created_at", -1).to_list(limit)
-    
-    for inquiry in inquiries:
-        if isinstance(inquiry.get('created_at'), str):
-            inquiry['created_at'] = datetime.fromisoformat(inquiry['created_at'])
-        if isinstance(inquiry.get('updated_at'), str):
-            inquiry['updated_at'] = datetime.fromisoformat(inquiry['updated_at'])
-    
-    return inquiries
+    if names:
+        return sparse_response(response, inquiries, Inquiry, names)
+    return json_response(inquiries, response)
 
 @api_router.get("/inquiries/{inquiry_id}")
-async def get_inquiry(inquiry_id: str):
-    inquiry = await db.inquiries.find_one({"id": inquiry_id}, {"_id": 0})
+async def get_inquiry(inquiry_id: str, request: Request, response: Response):
+    inquiry, recent_logs = await asyncio.gather(
+        db.inquiries.find_one({"id": inquiry_id}, {"_id": 0}),
+        db.inquiry_logs.find({"inquiry_id": inquiry_id}, {"_id": 0})
+        .sort([("timestamp", -1), ("id", -1)]).to_list(INQUIRY_RECENT_LOGS)
+    )
     if not inquiry:
         raise HTTPException(status_code=404, detail="Inquiry not found")
-    if isinstance(inquiry.get('created_at'), str):
-        inquiry['created_at'] = datetime.fromisoformat(inquiry['created_at'])
-    if isinstance(inquiry.get('updated_at'), str):
-        inquiry['updated_at'] = datetime.fromisoformat(inquiry['updated_at'])
-    return inquiry
+    # Oldest first, after any embedded logs that have not been migrated yet
+    logs = inquiry.get('conversation_logs', []) + recent_logs[::-1]
+    inquiry['conversation_logs'] = logs[-INQUIRY_RECENT_LOGS:]
+    return conditional_response(request, response, inquiry) or json_response(inquiry, response)
+
+@api_router.get("/inquiries/{inquiry_id}/logs", response_model=List[ConversationLog])
+async def get_inquiry_logs(
+    inquiry_id: str,
+    response: Response,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """Conversation logs of an inquiry, newest first unless order=asc"""
+    logs = await find_page(db.inquiry_logs, {"inquiry_id": inquiry_id}, limit, cursor, response,
+                           sort_field="timestamp", direction=1 if order == "asc" else -1)
+    if not logs and not await db.inquiries.find_one({"id": inquiry_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Inquiry not found")
+    return json_response(logs, response)
 
 @api_router.put("/inquiries/{inquiry_id}/status")
 async def update_inquiry_status(inquiry_id: str, status: str):
-    result = await db.inquiries.update_one(
+    previous = await db.inquiries.find_one_and_update(
         {"id": inquiry_id},
-        {"$set": {"status": status, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}},
+        projection={"_id": 0, "status": 1},
+        return_document=ReturnDocument.BEFORE
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Inquiry not found")
+    await record_change("inquiries", old=previous, new={"status": status})
     return {"message": "Status updated successfully"}
 
 # Assign inquiry to agent
 @api_router.put("/inquiries/{inquiry_id}/assign")
 async def assign_inquiry_to_agent(inquiry_id: str, agent_id: str):
-    inquiry = await db.inquiries.find_one({"id": inquiry_id})
+    inquiry = await db.inquiries.find_one({"id": inquiry_id}, {"status": 1})
     if not inquiry:
         raise HTTPException(status_code=404, detail="Inquiry not found")
     
@@ -939,34 +1813,24 @@ async def assign_inquiry_to_agent(inquiry_id: str, agent_id: str):
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    # Add assignment log
-    log_entry = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "agent_id": agent_id,
-        "agent_name": agent.get('name'),
-        "message": f"Inquiry assigned to {agent.get('name')}",
-        "status_change": "assigned"
-    }
-    
-    await db.inquiries.update_one(
-        {"id": inquiry_id},
-        {
-            "$set": {
-                "assigned_agent_id": agent_id,
-                "assigned_agent_name": agent.get('name'),
-                "status": "assigned",
-                "updated_at": datetime.now(timezone.utc).isoformat()
-            },
-            "$push": {"conversation_logs": log_entry}
+    # Assign and add assignment log
+    await append_inquiry_log(
+        inquiry_id, agent, f"Inquiry assigned to {agent.get('name')}", status_change="assigned",
+        update={
+            "assigned_agent_id": agent_id,
+            "assigned_agent_name": agent.get('name'),
+            "status": "assigned",
+            "updated_at": datetime.now(timezone.utc)
         }
     )
+    await record_change("inquiries", old=inquiry, new={"status": "assigned"})
     
     return {"message": f"Inquiry assigned to {agent.get('name')}"}
 
 # Unassign inquiry from agent
 @api_router.put("/inquiries/{inquiry_id}/unassign")
 async def unassign_inquiry(inquiry_id: str):
-    inquiry = await db.inquiries.find_one({"id": inquiry_id})
+    inquiry = await db.inquiries.find_one({"id": inquiry_id}, {"status": 1})
     if not inquiry:
         raise HTTPException(status_code=404, detail="Inquiry not found")
     
@@ -977,17 +1841,18 @@ async def unassign_inquiry(inquiry_id: str):
                 "assigned_agent_id": None,
                 "assigned_agent_name": None,
                 "status": "new",
-                "updated_at": datetime.now(timezone.utc).isoformat()
+                "updated_at": datetime.now(timezone.utc)
             }
         }
     )
+    await record_change("inquiries", old=inquiry, new={"status": "new"})
     
     return {"message": "Inquiry unassigned successfully"}
 
 # Add conversation log to inquiry
 @api_router.post("/inquiries/{inquiry_id}/log")
 async def add_conversation_log(inquiry_id: str, agent_id: str, message: str, new_status: Optional[str] = None):
-    inquiry = await db.inquiries.find_one({"id": inquiry_id})
+    inquiry = await db.inquiries.find_one({"id": inquiry_id}, {"status": 1})
     if not inquiry:
         raise HTTPException(status_code=404, detail="Inquiry not found")
     
@@ -995,27 +1860,17 @@ async def add_conversation_log(inquiry_id: str, agent_id: str, message: str, new
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    log_entry = {
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "agent_id": agent_id,
-        "agent_name": agent.get('name'),
-        "message": message,
-        "status_change": new_status
-    }
-    
     update_data = {
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "updated_at": datetime.now(timezone.utc)
     }
     if new_status:
         update_data["status"] = new_status
     
-    await db.inquiries.update_one(
-        {"id": inquiry_id},
-        {
-            "$set": update_data,
-            "$push": {"conversation_logs": log_entry}
-        }
-    )
+    await append_inquiry_log(inquiry_id, agent, message, status_change=new_status, update=update_data)
+    if new_status:
+        await record_change("inquiries", old=inquiry, new={"status": new_status})
+    else:
+        await cache.invalidate("dashboard:")  # Recent inquiries show log_count/last_log
     
     return {"message": "Conversation log added successfully"}
 
@@ -1037,60 +1892,840 @@ async def create_earnings_record(
         description=description
     )
     doc = earnings.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.earnings.insert_one(doc)
+    await record_earnings(owner_id, month, [(earnings.status, amount, 1)])
     return {"message": "Earnings record created", "id": earnings.id}
 
-@api_router.get("/earnings")
-async def get_earnings(owner_id: Optional[str] = None, property_id: Optional[str] = None):
+def earnings_list_query(owner_id: Optional[str], property_id: Optional[str]) -> dict:
+    """Filter shared by GET /earnings and the earnings export"""
     query = {}
     if owner_id:
         query['owner_id'] = owner_id
     if property_id:
         query['property_id'] = property_id
-    earnings = await db.earnings.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return earnings
+    return query
+
+@api_router.get("/earnings")
+async def get_earnings(
+    response: Response,
+    owner_id: Optional[str] = None,
+    property_id: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    query = earnings_list_query(owner_id, property_id)
+    names = parse_fields(fields, EarningsRecord.model_fields, always=("id", "created_at"))
+    earnings = await find_page(db.earnings, query, limit, cursor, response,
+                               projection=fields_projection(names) if names else None)
+    return json_response(earnings, response)
 
 @api_router.put("/earnings/{earnings_id}/status")
 async def update_earnings_status(earnings_id: str, status: str):
-    result = await db.earnings.update_one(
+    previous = await db.earnings.find_one_and_update(
         {"id": earnings_id},
-        {"$set": {"status": status}}
+        {"$set": {"status": status}},
+        projection={"_id": 0, "owner_id": 1, "month": 1, "amount": 1, "status": 1},
+        return_document=ReturnDocument.BEFORE
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Earnings record not found")
+    if previous.get('status') != status:
+        amount = previous.get('amount', 0)
+        await record_earnings(previous['owner_id'], previous['month'],
+                              [(previous.get('status'), -amount, -1), (status, amount, 1)])
     return {"message": "Status updated successfully"}
 
+# ============== MONTH CLOSE ==============
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+async def close_month(month: str, batch_size: int = 1000, dry_run: bool = False, on_batch=None) -> dict:
+    """Create the month's rent earnings record for every managed property with an owner.
+
+    Properties are streamed from one aggregation that already leaves out those
+    with a month_close record for month; the unique (property_id, month) index
+    on month_close records stops concurrent runs from double billing. Records
+    are written with insert_many(ordered=False) in batches of batch_size and
+    on_batch(result) is called after each batch.
+    """
+    started = time.perf_counter()
+    pipeline = [
+        {"$match": {"is_managed": True, "owner_id": {"$nin": [None, ""]}, "monthly_rent_amount": {"$gt": 0}}},
+        {"$lookup": {
+            "from": "earnings",
+            "let": {"property_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$property_id", "$$property_id"]},
+                    {"$eq": ["$month", month]},
+                    {"$eq": ["$source", "month_close"]}
+                ]}}},
+                {"$limit": 1},
+                {"$project": {"_id": 1}}
+            ],
+            "as": "closed"
+        }},
+        {"$match": {"closed": {"$size": 0}}},
+        {"$project": {"_id": 0, "id": 1, "owner_id": 1, "monthly_rent_amount": 1}}
+    ]
+    result = {"month": month, "dry_run": dry_run, "scanned": 0, "created": 0, "skipped": 0}
+    batch = []
+
+    async def flush():
+        records = batch[:]
+        batch.clear()
+        inserted = records
+        if not dry_run:
+            try:
+                await db.earnings.insert_many(records, ordered=False)
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != 11000 for error in errors):
+                    raise
+                failed = {error["index"] for error in errors}  # Closed by a concurrent run
+                inserted = [record for index, record in enumerate(records) if index not in failed]
+            await record_new_earnings(inserted)
+        result['created'] += len(inserted)
+        result['skipped'] += len(records) - len(inserted)
+        if on_batch:
+            on_batch(result)
+
+    async for prop in db.properties.aggregate(pipeline, batchSize=batch_size):
+        result['scanned'] += 1
+        batch.append(EarningsRecord.model_construct(
+            owner_id=prop['owner_id'],
+            property_id=prop['id'],
+            amount=float(prop['monthly_rent_amount']),
+            month=month,
+            description=f"Rent for {month}",
+            source="month_close"
+        ).model_dump())
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    elapsed = time.perf_counter() - started
+    result['seconds'] = round(elapsed, 3)
+    result['records_per_second'] = round(result['created'] / elapsed, 1) if elapsed else 0
+    return result
+
+@api_router.post("/earnings/close-month")
+async def close_earnings_month(
+    month: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="YYYY-MM, defaults to the current month"),
+    dry_run: bool = False,
+    batch_size: int = Query(1000, ge=1, le=10000),
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Generate rent earnings from monthly_rent_amount for every managed property (admin only).
+
+    Idempotent per (property_id, month): properties already closed for the
+    month are skipped.
+    """
+    return await close_month(month or datetime.now().strftime("%Y-%m"), batch_size=batch_size, dry_run=dry_run)
+
+# ============== BULK ==============
+
+# POST /api/{properties,owners,agents,inquiries}/bulk take a JSON array or an
+# NDJSON stream (Content-Type: application/x-ndjson) of items:
+#
+#     {"op": "create", "data": {...}}              an "id" in data is kept
+#     {"op": "update", "id": "...", "data": {...}}
+#     {"op": "delete", "id": "..."}
+#
+# An item without "op" is the document to create. The body is parsed as it
+# arrives and applied in batches of BULK_BATCH_SIZE items, each validated and
+# written with one unordered bulk_write. Per-item results are spooled to a
+# temporary file and streamed back in the request's format, so neither side
+# is held in memory. Updates and deletes are checked against the data as it
+# was before their batch, so a request should touch each id only once.
+BULK_BATCH_SIZE = 500
+BULK_MAX_ITEM_BYTES = 1024 * 1024
+BULK_SPOOL_BYTES = 4 * 1024 * 1024
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+WHITESPACE_RE = re.compile(r"\s*")
+ARRAY_DELIMITER_RE = re.compile(r"[\s,\]]")
+
+async def iter_ndjson(chunks):
+    """Raw lines of an NDJSON body; each is decoded with its item so one bad line fails alone"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+        if len(buffer) > BULK_MAX_ITEM_BYTES:
+            raise ValueError(f"Line {BULK_MAX_ITEM_BYTES} bytes long without a newline")
+    if buffer.strip():
+        yield buffer
+
+async def iter_json_array(chunks):
+    """Elements of a JSON array body, decoded one at a time as the chunks arrive"""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer, state = "", "start"  # start -> first/item -> separator -> end
+
+    def parse(final: bool):
+        nonlocal buffer, state
+        items, pos = [], 0
+        while True:
+            pos = WHITESPACE_RE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if state == "start":
+                if char != "[":
+                    raise ValueError("Body must be a JSON array or NDJSON")
+                pos, state = pos + 1, "first"
+            elif state == "separator":
+                if char not in ",]":
+                    raise ValueError("Expected ',' or ']' between array items")
+                pos, state = pos + 1, "item" if char == "," else "end"
+            elif state == "first" and char == "]":
+                pos, state = pos + 1, "end"
+            elif state in ("first", "item"):
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final or len(buffer) - pos > BULK_MAX_ITEM_BYTES:
+                        raise ValueError("Malformed or oversized item in the JSON array")
+                    break  # Wait for the rest of the item
+                if not final and not isinstance(item, (dict, list, str)) \
+                        and not ARRAY_DELIMITER_RE.search(buffer, end):
+                    # A number or literal may continue in the next chunk ("1." then "5")
+                    if len(buffer) - pos > BULK_MAX_ITEM_BYTES:
+                        raise ValueError("Malformed or oversized item in the JSON array")
+                    break
+                items.append(item)
+                pos, state = end, "separator"
+            else:
+                raise ValueError("Unexpected data after the JSON array")
+        buffer = buffer[pos:]
+        return items
+
+    async for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        for item in parse(final=False):
+            yield item
+    buffer += text_decoder.decode(b"", final=True)
+    for item in parse(final=True):
+        yield item
+    if state != "end":
+        raise ValueError("Unterminated JSON array")
+
+def stamp_updated(update_data: dict) -> dict:
+    update_data['updated_at'] = datetime.now(timezone.utc)
+    return update_data
+
+# Per collection: create model, update model, stored document for a validated
+# create dump, and $set fields for a validated update dump
+BULK_COLLECTIONS = {
+    "properties": (PropertyCreate, PropertyUpdate, lambda data: new_property(data)[1], property_update_fields),
+    "owners": (OwnerCreate, OwnerUpdate, lambda data: Owner(**data).model_dump(), stamp_updated),
+    "agents": (AgentCreate, AgentUpdate,
+               lambda data: Agent(**data).model_dump(exclude={"inquiry_status_counts"}), stamp_updated),
+    "inquiries": (InquiryCreate, InquiryUpdate,
+                  lambda data: Inquiry(**data).model_dump(exclude={"conversation_logs"}), stamp_updated),
+}
+
+BULK_STATUSES = {"create": "created", "update": "updated", "delete": "deleted"}
+
+def prepare_bulk_item(collection: str, item) -> tuple:
+    """Validate one item into (op, id, document or $set fields); raises ValueError"""
+    create_schema, update_schema, new_doc, set_fields = BULK_COLLECTIONS[collection]
+    if not isinstance(item, dict):
+        raise ValueError("Item must be a JSON object")
+    if "op" not in item:
+        item = {"op": "create", "data": item}
+    op, item_id, data = item.get("op"), item.get("id"), item.get("data") or {}
+    if op not in BULK_STATUSES:
+        raise ValueError("op must be one of create, update, delete")
+    if not isinstance(data, dict):
+        raise ValueError("data must be a JSON object")
+    if op == "create":
+        doc = new_doc(create_schema(**data).model_dump())
+        item_id = item_id or data.get("id")
+        if item_id:
+            doc['id'] = str(item_id)
+        return op, doc['id'], doc
+    if not item_id:
+        raise ValueError(f"id is required for {op}")
+    if op == "delete":
+        return op, str(item_id), None
+    update_data = update_schema(**data).model_dump(exclude_unset=True)
+    if not update_data:
+        raise ValueError("data has no fields to update")
+    return op, str(item_id), set_fields(update_data)
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'data'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+async def apply_bulk_batch(collection: str, batch: List[tuple]) -> List[dict]:
+    """Validate and write one batch of (index, item) pairs; returns a result per item"""
+    results = {}
+    planned = []  # (index, op, id, payload) for items that passed validation
+    seen = set()
+    for index, item in batch:
+        result = results[index] = {"index": index, "op": None, "id": None}
+        try:
+            if isinstance(item, bytes):
+                try:
+                    item = orjson.loads(item)
+                except orjson.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON: {e}")
+            if isinstance(item, dict):
+                result['op'], result['id'] = item.get("op", "create"), item.get("id")
+            op, item_id, payload = prepare_bulk_item(collection, item)
+            result['id'] = item_id
+            if op != "create" and item_id in seen:
+                raise ValueError("id appears more than once in the batch")
+            seen.add(item_id)
+        except ValidationError as e:
+            result.update(status="error", error=validation_message(e))
+            continue
+        except ValueError as e:
+            result.update(status="error", error=str(e))
+            continue
+        planned.append((index, op, item_id, payload))
+
+    # Documents touched by updates and deletes, with the fields the counters need
+    existing = {}
+    target_ids = [item_id for _, op, item_id, _ in planned if op != "create"]
+    if target_ids:
+        projection = {"_id": 0, "id": 1, **{field: 1 for field in COUNTED_FIELDS[collection]}}
+        async for doc in db[collection].find({"id": {"$in": target_ids}}, projection):
+            existing[doc['id']] = doc
+
+    agent_names = {}
+    if collection == "inquiries":
+        agent_ids = {payload['assigned_agent_id'] for _, op, _, payload in planned
+                     if op == "update" and payload.get('assigned_agent_id')}
+        if agent_ids:
+            async for agent in db.agents.find({"id": {"$in": list(agent_ids)}}, {"_id": 0, "id": 1, "name": 1}):
+                agent_names[agent['id']] = agent.get('name')
+
+    writes, written = [], []
+    for index, op, item_id, payload in planned:
+        if op != "create" and item_id not in existing:
+            results[index].update(status="error", error="Not found")
+            continue
+        if op == "create":
+            writes.append(InsertOne(payload))
+        elif op == "update":
+            if "assigned_agent_id" in payload:
+                agent_id = payload['assigned_agent_id']
+                if agent_id and agent_id not in agent_names:
+                    results[index].update(status="error", error="Agent not found")
+                    continue
+                payload['assigned_agent_name'] = agent_names.get(agent_id)
+            writes.append(UpdateOne({"id": item_id}, {"$set": payload}))
+        else:
+            writes.append(DeleteOne({"id": item_id}))
+        written.append((index, op, item_id, payload))
+
+    failed = {}
+    if writes:
+        try:
+            await db[collection].bulk_write(writes, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error['index']] = "Already exists" if error.get("code") == 11000 else error.get("errmsg")
+
+    inc, deleted_ids = {}, []
+    for position, (index, op, item_id, payload) in enumerate(written):
+        if position in failed:
+            results[index].update(status="error", error=failed[position] or "Write failed")
+            continue
+        old = existing.get(item_id)
+        if op == "create":
+            add_counter_changes(inc, collection, new=payload)
+        elif op == "update":
+            add_counter_changes(inc, collection, old=old, new={**old, **payload})
+        else:
+            add_counter_changes(inc, collection, old=old)
+            deleted_ids.append(item_id)
+        results[index]['status'] = BULK_STATUSES[op]
+    await apply_counter_changes(inc)
+    if collection == "inquiries" and deleted_ids:
+        await db.inquiry_logs.delete_many({"inquiry_id": {"$in": deleted_ids}})
+    return [results[index] for index, _ in batch]
+
+def spooled_body(results, summary: dict, ndjson: bool):
+    """Response body around the spooled results; closes the spool when done"""
+    try:
+        results.seek(0)
+        if not ndjson:
+            yield b'{"summary":' + orjson.dumps(summary) + b',"results":['
+        while chunk := results.read(64 * 1024):
+            yield chunk
+        yield orjson.dumps({"summary": summary}) + b"\n" if ndjson else b"]}"
+    finally:
+        results.close()
+
+async def run_bulk(collection: str, request: Request) -> Response:
+    started = time.perf_counter()
+    ndjson = request.headers.get("content-type", "").split(";")[0].strip() == NDJSON_MEDIA_TYPE
+    items = iter_ndjson(request.stream()) if ndjson else iter_json_array(request.stream())
+    results = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_BYTES)
+    summary = {"total": 0, "created": 0, "updated": 0, "deleted": 0, "errors": 0}
+
+    async def flush(batch: List[tuple]):
+        for result in await apply_bulk_batch(collection, batch):
+            summary['errors' if result['status'] == "error" else result['status']] += 1
+            line = orjson.dumps(result)
+            if ndjson:
+                results.write(line + b"\n")
+            else:
+                results.write(b"," + line if results.tell() else line)
+
+    batch, parse_error = [], None
+    try:
+        async for item in items:
+            batch.append((summary['total'], item))
+            summary['total'] += 1
+            if len(batch) >= BULK_BATCH_SIZE:
+                await flush(batch)
+                batch = []
+    except ValueError as e:
+        parse_error = str(e)
+    if parse_error and not summary['total']:
+        results.close()
+        raise HTTPException(status_code=400, detail=parse_error)
+    if batch:
+        await flush(batch)
+
+    if collection in ("properties", "owners"):  # Listings carry owner_name
+        await cache.invalidate("properties:")
+    if parse_error:
+        summary['error'] = f"Stopped after item {summary['total'] - 1}: {parse_error}"
+    summary['seconds'] = round(time.perf_counter() - started, 3)
+    return StreamingResponse(
+        spooled_body(results, summary, ndjson),
+        media_type=NDJSON_MEDIA_TYPE if ndjson else "application/json"
+    )
+
+@api_router.post("/properties/bulk")
+async def bulk_properties(request: Request, current_user: dict = Depends(require_role(["admin"]))):
+    """Create, update and delete properties in bulk (admin only, see BULK above)"""
+    return await run_bulk("properties", request)
+
+@api_router.post("/owners/bulk")
+async def bulk_owners(request: Request, current_user: dict = Depends(require_role(["admin"]))):
+    """Create, update and delete owners in bulk (admin only)"""
+    return await run_bulk("owners", request)
+
+@api_router.post("/agents/bulk")
+async def bulk_agents(request: Request, current_user: dict = Depends(require_role(["admin"]))):
+    """Create, update and delete agents in bulk (admin only)"""
+    return await run_bulk("agents", request)
+
+@api_router.post("/inquiries/bulk")
+async def bulk_inquiries(request: Request, current_user: dict = Depends(require_role(["admin"]))):
+    """Create, update and delete inquiries in bulk (admin only); deletes drop their logs too"""
+    return await run_bulk("inquiries", request)
+
+# ============== EXPORT ==============
+
+# GET /api/export/{properties,inquiries,earnings} stream every matching
+# document as CSV or NDJSON straight from a server-side cursor, taking the
+# same filters (and fields=) as the list endpoints. Nothing beyond one batch
+# is held in memory and the CSV header goes out before the first query.
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": NDJSON_MEDIA_TYPE}
+
+def csv_cell(value):
+    """CSV text for a document value; lists and objects are written as JSON"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, (list, dict)):
+        return orjson.dumps(value, option=ORJSON_OPTIONS).decode()
+    return value
+
+async def export_chunks(cursor, columns: List[str], export_format: str, prepare=None):
+    """Encoded output for the documents of a find() cursor, one chunk per batch.
+
+    prepare(docs) is awaited on each batch before it is written, e.g. to
+    attach denormalized names.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    async def encode(docs: List[dict]) -> bytes:
+        if prepare:
+            await prepare(docs)
+        if export_format == "ndjson":
+            return b"".join(
+                orjson.dumps({column: doc.get(column) for column in columns}, option=ORJSON_OPTIONS) + b"\n"
+                for doc in docs
+            )
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([csv_cell(doc.get(column)) for column in columns] for doc in docs)
+        return buffer.getvalue().encode()
+
+    try:
+        if export_format == "csv":
+            writer.writerow(columns)
+            yield buffer.getvalue().encode()
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield await encode(batch)
+                batch = []
+        if batch:
+            yield await encode(batch)
+    finally:
+        await cursor.close()
+
+def export_response(collection: str, chunks, export_format: str) -> StreamingResponse:
+    filename = f"{collection}-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{export_format}"
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+EXPORT_FORMAT_QUERY = Query("csv", alias="format", pattern="^(csv|ndjson)$")
+
+@api_router.get("/export/properties")
+async def export_properties(
+    property_type: Optional[str] = None,
+    status: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_area: Optional[float] = None,
+    max_area: Optional[float] = None,
+    sort: str = Query("newest", pattern="^(" + "|".join(PROPERTY_SORTS) + ")$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export"),
+    export_format: str = EXPORT_FORMAT_QUERY,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Export properties matching the GET /properties filters (admin only)"""
+    sort_field, direction = PROPERTY_SORTS[sort]
+    query = property_list_query(property_type, status, owner_id, min_price, max_price, min_area, max_area, sort_field)
+    columns = parse_fields(fields, Property.model_fields) or list(Property.model_fields)
+    projection = fields_projection(columns + ["owner_id"] if "owner_name" in columns else columns)
+    cursor = db.properties.find(query, projection) \
+        .sort([(sort_field, direction), ("id", direction)]).batch_size(EXPORT_BATCH_SIZE)
+
+    async def prepare(docs: List[dict]):
+        await attach_names(docs, db.owners, "owner_id", "owner_name")
+
+    return export_response(
+        "properties",
+        export_chunks(cursor, columns, export_format, prepare if "owner_name" in columns else None),
+        export_format
+    )
+
+@api_router.get("/export/inquiries")
+async def export_inquiries(
+    status: Optional[str] = None,
+    inquiry_type: Optional[str] = None,
+    assigned_agent_id: Optional[str] = None,
+    unassigned: Optional[bool] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export"),
+    export_format: str = EXPORT_FORMAT_QUERY,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Export inquiries matching the GET /inquiries filters, newest first (admin only).
+
+    Conversation logs are not included; last_log and log_count are.
+    """
+    query = inquiry_list_query(status, inquiry_type, assigned_agent_id, unassigned)
+    columns = parse_fields(fields, INQUIRY_LIST_FIELDS) or INQUIRY_LIST_FIELDS
+    cursor = db.inquiries.find(query, fields_projection(columns)) \
+        .sort([("created_at", -1), ("id", -1)]).batch_size(EXPORT_BATCH_SIZE)
+    return export_response("inquiries", export_chunks(cursor, columns, export_format), export_format)
+
+@api_router.get("/export/earnings")
+async def export_earnings(
+    owner_id: Optional[str] = None,
+    property_id: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export"),
+    export_format: str = EXPORT_FORMAT_QUERY,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Export earnings records matching the GET /earnings filters, newest first (admin only)"""
+    query = earnings_list_query(owner_id, property_id)
+    columns = parse_fields(fields, EarningsRecord.model_fields) or list(EarningsRecord.model_fields)
+    cursor = db.earnings.find(query, fields_projection(columns)) \
+        .sort([("created_at", -1), ("id", -1)]).batch_size(EXPORT_BATCH_SIZE)
+    return export_response("earnings", export_chunks(cursor, columns, export_format), export_format)
+
+# ============== CSV IMPORT ==============
+
+# POST /api/import/{properties,owners} (admin) and `python manage.py import-csv`
+# read a CSV with a header row IMPORT_BATCH_SIZE rows at a time and create
+# each batch through apply_bulk_batch (see BULK), so files of any size import
+# in bounded memory. Columns are model fields and empty cells are left out so
+# defaults apply; features/amenities/images take a JSON array or "a; b; c",
+# geo takes GeoJSON or latitude/longitude columns. CSV exports read back in.
+#
+# Property rows may name their owner by owner_email instead of owner_id;
+# emails are resolved with one query per batch, and an unknown email creates
+# the owner when the row also has owner_name and owner_phone. Owner rows
+# whose email already exists are skipped, so owner imports can be re-run.
+# Each batch is written before the next is read, so later batches find
+# earlier rows' owners in the database; the import only remembers the most
+# recent IMPORT_OWNER_CACHE_SIZE emails to save queries (and, in a dry run,
+# to spot repeated emails), keeping memory bounded however long the file.
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_ERRORS = 100  # Row errors listed in the summary; all are counted
+IMPORT_OWNER_CACHE_SIZE = 10000
+CSV_LIST_FIELDS = ("features", "amenities", "images")
+
+def csv_row_data(row: dict) -> dict:
+    """Model input for one csv.DictReader row; raises ValueError on malformed cells"""
+    data = {}
+    for key, value in row.items():
+        if key is not None and isinstance(value, str) and value.strip():
+            data[key.strip()] = value.strip()
+    for field in CSV_LIST_FIELDS:
+        if field in data:
+            value = data[field]
+            data[field] = orjson.loads(value) if value.startswith("[") else \
+                [part.strip() for part in value.split(";") if part.strip()]
+    if "geo" in data:
+        data['geo'] = orjson.loads(data['geo'])
+    latitude, longitude = data.pop("latitude", None), data.pop("longitude", None)
+    if latitude is not None and longitude is not None and "geo" not in data:
+        data['geo'] = {"type": "Point", "coordinates": [float(longitude), float(latitude)]}
+    return data
+
+def import_error(result: dict, row: int, message: str):
+    result['errors'] += 1
+    if len(result['error_rows']) < IMPORT_MAX_ERRORS:
+        result['error_rows'].append({"row": row, "error": message})
+
+async def find_owner_ids(emails: Iterable[str]) -> dict:
+    """Owner id per lowercased email for the given emails, in one query"""
+    emails = list(set(emails))
+    owner_ids = {}
+    if emails:
+        # Case-insensitive match, served by the owners email index with the same collation
+        async for owner in db.owners.find({"email": {"$in": emails}}, {"_id": 0, "id": 1, "email": 1},
+                                          collation=EMAIL_COLLATION):
+            owner_ids.setdefault(owner['email'].lower(), owner['id'])
+    return owner_ids
+
+def remember_owners(owner_ids: dict, emails: dict):
+    """Add emails to the import's owner cache, dropping the oldest beyond IMPORT_OWNER_CACHE_SIZE"""
+    owner_ids.update(emails)
+    for email in list(itertools.islice(owner_ids, max(len(owner_ids) - IMPORT_OWNER_CACHE_SIZE, 0))):
+        del owner_ids[email]
+
+async def resolve_property_owners(items: List[tuple], owner_ids: dict, result: dict, dry_run: bool) -> List[tuple]:
+    """Set owner_id from owner_email on property rows, creating missing owners; drops unresolvable rows"""
+    known, wanted = {}, set()  # This batch's owners: lowercased email -> id (None if not written)
+    for _, data in items:
+        if "owner_email" in data and "owner_id" not in data:
+            email = data['owner_email'].lower()
+            if email in owner_ids:
+                known[email] = owner_ids[email]
+            else:
+                wanted.add(data['owner_email'])
+    known.update(await find_owner_ids(wanted))
+
+    new_owners = {}
+    for row, data in items:
+        email = data.get('owner_email', "").lower()
+        if email and "owner_id" not in data and email not in known and email not in new_owners \
+                and data.get('owner_name') and data.get('owner_phone'):
+            new_owners[email] = (row, {"op": "create", "data": {
+                "name": data['owner_name'], "email": data['owner_email'], "phone": data['owner_phone']
+            }})
+    failed_owners = {}
+    if new_owners and dry_run:
+        known.update({email: None for email in new_owners})
+        result['owners_created'] += len(new_owners)
+    elif new_owners:
+        email_by_row = {row: email for email, (row, _) in new_owners.items()}
+        for owner in await apply_bulk_batch("owners", list(new_owners.values())):
+            if owner['status'] == "created":
+                known[email_by_row[owner['index']]] = owner['id']
+                result['owners_created'] += 1
+            else:
+                failed_owners[email_by_row[owner['index']]] = owner['error']
+
+    resolved = []
+    for row, data in items:
+        if "owner_email" in data and "owner_id" not in data:
+            email = data['owner_email'].lower()
+            if email in failed_owners:
+                import_error(result, row, f"Could not create owner {data['owner_email']}: {failed_owners[email]}")
+                continue
+            if email not in known:
+                import_error(result, row, f"Unknown owner_email {data['owner_email']}; "
+                                          "add owner_name and owner_phone to create the owner")
+                continue
+            if known[email]:
+                data['owner_id'] = known[email]
+        resolved.append((row, data))
+    remember_owners(owner_ids, known)
+    return resolved
+
+async def skip_existing_owners(items: List[tuple], owner_ids: dict, result: dict, dry_run: bool) -> List[tuple]:
+    """Drop owner rows whose email is already taken, in the database or earlier in the file"""
+    taken = await find_owner_ids(
+        data['email'] for _, data in items if "email" in data and data['email'].lower() not in owner_ids
+    )
+    fresh, claimed = [], {}
+    for row, data in items:
+        email = data.get('email', "").lower()
+        if email and (email in owner_ids or email in taken or email in claimed):
+            result['skipped'] += 1
+            continue
+        if email:
+            claimed[email] = None
+        fresh.append((row, data))
+    # Written rows are found in the database by later batches; a dry run has to remember them
+    remember_owners(owner_ids, {**taken, **claimed} if dry_run else taken)
+    return fresh
+
+async def import_csv(collection: str, rows, batch_size: int = IMPORT_BATCH_SIZE, dry_run: bool = False,
+                     on_batch=None) -> dict:
+    """Create properties or owners from the rows of a csv.DictReader.
+
+    rows is read batch_size rows at a time in a worker thread, so it can sit
+    on a file of any size. With dry_run the rows are validated and owner
+    emails resolved, but nothing is written. on_batch(result) is called after
+    each batch.
+    """
+    started = time.perf_counter()
+    result = {"collection": collection, "dry_run": dry_run, "rows": 0, "created": 0, "skipped": 0,
+              "owners_created": 0, "errors": 0, "error_rows": []}
+    owner_ids = {}  # Recent lowercased emails -> owner id (None when not written), see remember_owners
+    while True:
+        chunk = await asyncio.to_thread(list, itertools.islice(rows, batch_size))
+        if not chunk:
+            break
+        items = []
+        for row_data in chunk:
+            result['rows'] += 1
+            try:
+                items.append((result['rows'], csv_row_data(row_data)))
+            except ValueError as e:
+                import_error(result, result['rows'], f"Malformed cell: {e}")
+
+        if collection == "owners":
+            items = await skip_existing_owners(items, owner_ids, result, dry_run)
+        else:
+            items = await resolve_property_owners(items, owner_ids, result, dry_run)
+
+        if dry_run:
+            for row, data in items:
+                try:
+                    prepare_bulk_item(collection, {"op": "create", "data": data})
+                    result['created'] += 1
+                except ValidationError as e:
+                    import_error(result, row, validation_message(e))
+                except ValueError as e:
+                    import_error(result, row, str(e))
+        elif items:
+            batch = [(row, {"op": "create", "data": data}) for row, data in items]
+            for item in await apply_bulk_batch(collection, batch):
+                if item['status'] == "error":
+                    import_error(result, item['index'], item['error'])
+                else:
+                    result['created'] += 1
+        if on_batch:
+            on_batch(result)
+
+    if not dry_run and result['created'] + result['owners_created']:
+        await cache.invalidate("properties:")
+    elapsed = time.perf_counter() - started
+    result['seconds'] = round(elapsed, 3)
+    result['rows_per_second'] = round(result['rows'] / elapsed, 1) if elapsed else 0
+    return result
+
+def csv_rows(binary_file) -> csv.DictReader:
+    """DictReader over an uploaded or opened binary file (UTF-8, with or without BOM)"""
+    # Decode line by line: before Python 3.11 an upload's SpooledTemporaryFile can't be wrapped in TextIOWrapper
+    return csv.DictReader(codecs.iterdecode(binary_file, "utf-8-sig"))
+
+@api_router.post("/import/properties")
+async def import_properties_csv(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Create properties from a CSV upload (admin only, see CSV IMPORT above)"""
+    return await import_csv("properties", csv_rows(file.file), dry_run=dry_run)
+
+@api_router.post("/import/owners")
+async def import_owners_csv(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Create owners from a CSV upload, skipping emails that already exist (admin only)"""
+    return await import_csv("owners", csv_rows(file.file), dry_run=dry_run)
+
 # ============== DASHBOARD ==============
 
 @api_router.get("/dashboard/stats", response_model=DashboardStats)
 async def get_dashboard_stats():
-    total_properties = await db.properties.count_documents({})
-    active_properties = await db.properties.count_documents({"status": "active"})
-    total_inquiries = await db.inquiries.count_documents({})
-    new_inquiries = await db.inquiries.count_documents({"status": "new"})
-    total_owners = await db.owners.count_documents({})
-    total_agents = await db.agents.count_documents({"status": "active"})
-    
-    pipeline = [{"$group": {"_id": "$property_type", "count": {"$sum": 1}}}]
-    type_counts = await db.properties.aggregate(pipeline).to_list(100)
-    properties_by_type = {item['_id']: item['count'] for item in type_counts if item['_id']}
-    
-    recent = await db.inquiries.find({}, {"_id": 0}).sort("created_at", -1).to_list(5)
-    for inquiry in recent:
-        if isinstance(inquiry.get('created_at'), str):
-            inquiry['created_at'] = inquiry['created_at']
-    
-    return DashboardStats(
-        total_properties=total_properties,
-        active_properties=active_properties,
-        total_inquiries=total_inquiries,
-        new_inquiries=new_inquiries,
-        total_owners=total_owners,
-        total_agents=total_agents,
-        properties_by_type=properties_by_type,
+    cached = await cache.get("dashboard:stats")
+    if cached is not MISSING:
+        return cached
+
+    counters, recent = await asyncio.gather(
+        db.dashboard_counters.find_one({"id": DASHBOARD_COUNTERS_ID}, {"_id": 0}),
+        db.inquiries.find({}, INQUIRY_LIST_PROJECTION).sort([("created_at", -1), ("id", -1)]).to_list(5)
+    )
+    if counters is None:
+        counters = await rebuild_dashboard_counters()
+
+    properties = counters.get('properties', {})
+    inquiries = counters.get('inquiries', {})
+    stats = DashboardStats(
+        total_properties=properties.get('total', 0),
+        active_properties=properties.get('by_status', {}).get('active', 0),
+        total_inquiries=inquiries.get('total', 0),
+        new_inquiries=inquiries.get('by_status', {}).get('new', 0),
+        total_owners=counters.get('owners', {}).get('total', 0),
+        total_agents=counters.get('agents', {}).get('by_status', {}).get('active', 0),
+        properties_by_type={
+            property_type: count
+            for property_type, count in properties.get('by_property_type', {}).items()
+            if count and property_type != 'unknown'
+        },
         recent_inquiries=recent
     )
+    await cache.set("dashboard:stats", stats)
+    return stats
+
+# ============== ADMIN ==============
+
+@api_router.get("/admin/indexes")
+async def get_index_report(current_user: dict = Depends(require_role(["admin"]))):
+    """Report missing and unexpected MongoDB indexes (admin only)"""
+    return await index_report(db)
+
+@api_router.post("/admin/stats/reconcile")
+async def reconcile_dashboard_counters(current_user: dict = Depends(require_role(["admin"]))):
+    """Rebuild the materialized dashboard counters and earnings rollups (admin only)"""
+    counters, rollups = await asyncio.gather(rebuild_dashboard_counters(), rebuild_earnings_rollups())
+    return {**counters, "earnings_rollups": rollups}
+
+@api_router.get("/admin/metrics")
+async def get_metrics(current_user: dict = Depends(require_role(["admin"]))):
+    """Runtime counters for caches and worker pools (admin only)"""
+    return {
+        "cache": cache.stats(),
+        "auth_cache": auth_cache.stats(),
+        "password_pool": dict(password_pool_stats)
+    }
 
 # ============== INITIAL SETUP ==============
 
@@ -1111,11 +2746,11 @@ async def setup_admin():
         "email": "admin@instamakaan.com",
         "name": "Admin User",
         "role": "admin",
-        "password_hash": get_password_hash("admin123"),  # Default password
+        "password_hash": await get_password_hash("admin123"),  # Default password
         "status": "active",
         "linked_id": None,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc)
     }
     
     await db.users.insert_one(admin_user)
@@ -1136,6 +2771,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Configure logging
@@ -1145,6 +2781,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_db_indexes():
+    await ensure_indexes(db)
+
+@app.on_event("startup")
+async def build_missing_earnings_rollups():
+    """Backfill earnings_rollups on the first start after upgrading from a version without them"""
+    if await db.earnings_rollups.find_one({}, {"_id": 1}) is None and \
+            await db.earnings.find_one({}, {"_id": 1}) is not None:
+        rollups = await rebuild_earnings_rollups()
+        logger.info("Built %d earnings rollups from existing earnings records", rollups)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    password_executor.shutdown(wait=False)
@@ -0,0 +1,152 @@
+"""
+InstaMakaan - Static serving for /uploads
+
+Uploaded files never change once written: new uploads are named after the
+SHA-256 of their content (older ones after a random UUID) and variants are
+derived from those names. UploadStaticFiles exploits that:
+
+- Cache-Control: public, max-age=31536000, immutable, so browsers stop
+  revalidating images on every page view.
+- Strong ETags (the content hash when the filename is one).
+- Single-range requests (Range / If-Range) answered with 206 or 416.
+- Precompressed siblings (<file>.br, <file>.gz) served when the client
+  accepts that encoding.
+- Full-file bodies use the ASGI "http.response.pathsend" extension when the
+  server offers it, letting it sendfile() without copying through Python.
+"""
+
+import os
+import re
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+CONTENT_HASH_RE = re.compile(r"^[0-9a-f]{64}")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def strong_etag(path: Path, stat_result: os.stat_result, encoding: Optional[str]) -> str:
+    match = CONTENT_HASH_RE.match(path.name)
+    if match:
+        # <sha256>.<ext> or <sha256>_<variant>.webp: unique per content
+        tag = path.name.split(".")[0]
+    else:
+        tag = f"{path.name}-{stat_result.st_size}-{int(stat_result.st_mtime)}"
+    if encoding:
+        tag += f"-{encoding}"
+    return f'"{tag}"'
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single "bytes=" range into inclusive (start, end).
+
+    Returns None when the header should be ignored (multiple ranges or bad
+    syntax) and raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+class UploadFileResponse(FileResponse):
+    """FileResponse with immutable caching, strong ETags and single-range support"""
+
+    def __init__(self, path: Path, stat_result: os.stat_result, request_headers: Headers,
+                 encoding: Optional[str] = None, original_path: Optional[Path] = None):
+        media_type = guess_type(str(original_path or path))[0] or "application/octet-stream"
+        super().__init__(path, stat_result=stat_result, media_type=media_type)
+        self.byte_range = None
+        self.headers["etag"] = strong_etag(original_path or path, stat_result, encoding)
+        self.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        self.headers["vary"] = "Accept-Encoding"
+        if encoding:
+            self.headers["content-encoding"] = encoding
+            return
+
+        self.headers["accept-ranges"] = "bytes"
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if not range_header or (if_range and if_range != self.headers["etag"]):
+            return
+        size = stat_result.st_size
+        try:
+            self.byte_range = parse_range(range_header, size)
+        except ValueError:
+            self.status_code = 416
+            self.headers["content-range"] = f"bytes */{size}"
+            self.headers["content-length"] = "0"
+            return
+        if self.byte_range:
+            start, end = self.byte_range
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.status_code == 200:
+            await super().__call__(scope, receive, send)
+            return
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.status_code != 206 or scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        start, end = self.byte_range
+        remaining = end - start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0 and bool(chunk)})
+                if not chunk:
+                    break
+
+
+class UploadStaticFiles(StaticFiles):
+    """StaticFiles for immutable upload files (see module docstring)"""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope,
+                      status_code: int = 200) -> Response:
+        if status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        path = Path(full_path)
+        served_path, served_stat, encoding = path, stat_result, None
+        accept_encoding = request_headers.get("accept-encoding", "")
+        for candidate, suffix in PRECOMPRESSED_ENCODINGS:
+            if candidate in accept_encoding:
+                try:
+                    compressed = path.with_name(path.name + suffix)
+                    served_stat = os.stat(compressed)
+                    served_path, encoding = compressed, candidate
+                    break
+                except FileNotFoundError:
+                    served_stat = stat_result
+
+        response = UploadFileResponse(
+            served_path, served_stat, request_headers, encoding=encoding, original_path=path
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -252,7 +252,7 @@ const InquiryDetailDrawer = ({ inquiryId, agentId, isOpen, onClose, onUpdate })
             {/* Activity / Conversation Logs */}
             <div>
               <h4 className="text-sm font-medium text-muted-foreground mb-3">
-                Activity Log ({inquiry.conversation_logs?.length || 0})
+                Activity Log ({inquiry.log_count || inquiry.conversation_logs?.length || 0})
               </h4>
               <div className="space-y-3 max-h-64 overflow-y-auto">
                 {inquiry.conversation_logs?.length > 0 ? (
@@ -0,0 +1,6 @@
+// Columns requested with ?fields= by the list pages, so each list only
+// downloads what it renders.
+export const PUBLIC_PROPERTY_FIELDS = 'title,location,price,price_label,property_type,beds,baths,area,features,images,is_managed';
+export const ADMIN_PROPERTY_FIELDS = 'title,location,price,price_label,property_type,status,images';
+export const ADMIN_INQUIRY_FIELDS = 'name,email,phone,inquiry_type,status,assigned_agent_id,assigned_agent_name,created_at';
+export const AGENT_INQUIRY_FIELDS = 'name,email,phone,message,status,created_at,log_count,last_log';
@@ -25,6 +25,7 @@ import {
 } from 'lucide-react';
 import { cn } from '@/lib/utils';
 import { Link, useSearchParams } from 'react-router-dom';
+import { PUBLIC_PROPERTY_FIELDS } from '@/lib/listFields';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -159,7 +160,7 @@ const PropertiesPage = () => {
   const fetchProperties = async () => {
     setLoading(true);
     try {
-      const response = await fetch(`${BACKEND_URL}/api/properties?property_type=${activeTab}&status=active`);
+      const response = await fetch(`${BACKEND_URL}/api/properties?property_type=${activeTab}&status=active&fields=${PUBLIC_PROPERTY_FIELDS}`);
       if (response.ok) {
         const data = await response.json();
         setProperties(data);
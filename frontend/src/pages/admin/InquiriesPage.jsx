@@ -42,6 +42,7 @@ import {
 import { cn } from '@/lib/utils';
 import { toast } from 'sonner';
 import { format } from 'date-fns';
+import { ADMIN_INQUIRY_FIELDS } from '@/lib/listFields';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -74,7 +75,7 @@ const InquiriesPage = () => {
 
   const fetchInquiries = async () => {
     try {
-      const response = await fetch(`${BACKEND_URL}/api/inquiries`);
+      const response = await fetch(`${BACKEND_URL}/api/inquiries?fields=${ADMIN_INQUIRY_FIELDS}`);
       const data = await response.json();
       setInquiries(data);
     } catch (error) {
@@ -43,6 +43,7 @@ import {
 import { cn } from '@/lib/utils';
 import { toast } from 'sonner';
 import PropertyPreviewDrawer from '@/components/admin/PropertyPreviewDrawer';
+import { ADMIN_PROPERTY_FIELDS } from '@/lib/listFields';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -60,7 +61,7 @@ const PropertiesListPage = () => {
 
   const fetchProperties = async () => {
     try {
-      const response = await fetch(`${BACKEND_URL}/api/properties`);
+      const response = await fetch(`${BACKEND_URL}/api/properties?fields=${ADMIN_PROPERTY_FIELDS}`);
       const data = await response.json();
       setProperties(data);
     } catch (error) {
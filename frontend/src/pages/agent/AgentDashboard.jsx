@@ -20,6 +20,7 @@ import { cn } from '@/lib/utils';
 import { toast } from 'sonner';
 import { format } from 'date-fns';
 import InquiryDetailDrawer from '@/components/admin/InquiryDetailDrawer';
+import { AGENT_INQUIRY_FIELDS } from '@/lib/listFields';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -49,7 +50,7 @@ const AgentDashboard = () => {
 
   const fetchAgentInquiries = async () => {
     try {
-      const response = await fetch(`${BACKEND_URL}/api/agents/${user.linked_id}/inquiries`);
+      const response = await fetch(`${BACKEND_URL}/api/agents/${user.linked_id}/inquiries?fields=${AGENT_INQUIRY_FIELDS}`);
       if (response.ok) {
         const result = await response.json();
         setData(result);
@@ -256,22 +257,20 @@ const AgentDashboard = () => {
                       </div>
                     </div>
 
-                    {/* Conversation Logs */}
-                    {inquiry.conversation_logs?.length > 0 && (
+                    {/* Latest Conversation Log (full history in the detail drawer) */}
+                    {inquiry.last_log && (
                       <div className="mt-4 pt-4 border-t border-border">
-                        <p className="text-xs font-medium text-muted-foreground mb-2">Recent Activity</p>
-                        <div className="space-y-2">
-                          {inquiry.conversation_logs.slice(-3).map((log, index) => (
-                            <div key={index} className="flex items-start gap-2 text-sm">
-                              <CheckCircle2 className="w-4 h-4 text-primary mt-0.5 shrink-0" />
-                              <div>
-                                <p className="text-foreground">{log.message}</p>
-                                <p className="text-xs text-muted-foreground">
-                                  {log.agent_name} • {format(new Date(log.timestamp), 'MMM d, h:mm a')}
-                                </p>
-                              </div>
-                            </div>
-                          ))}
+                        <p className="text-xs font-medium text-muted-foreground mb-2">
+                          Recent Activity ({inquiry.log_count} {inquiry.log_count === 1 ? 'update' : 'updates'})
+                        </p>
+                        <div className="flex items-start gap-2 text-sm">
+                          <CheckCircle2 className="w-4 h-4 text-primary mt-0.5 shrink-0" />
+                          <div>
+                            <p className="text-foreground">{inquiry.last_log.message}</p>
+                            <p className="text-xs text-muted-foreground">
+                              {inquiry.last_log.agent_name} • {format(new Date(inquiry.last_log.timestamp), 'MMM d, h:mm a')}
+                            </p>
+                          </div>
                         </div>
                       </div>
                     )}
@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# The backend runs from backend/ and imports its modules as top-level names
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+# server.py reads MONGO_URL at import time; tests stub server.db so nothing connects to it
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "instamakaan_test")
@@ -0,0 +1,82 @@
+"""The bulk endpoints' streaming body parsers must not depend on where chunks split."""
+
+import asyncio
+import json
+import re
+
+import orjson
+import pytest
+
+from server import iter_json_array, iter_ndjson
+
+ITEMS = [
+    {"name": "Café Owner", "email": "cafe@example.com", "phone": "9999999999", "notes": "₹25,000 deposit 🏠"},
+    1.5,
+    -20,
+    True,
+    None,
+    "plain string",
+    {"op": "update", "id": "owner-1", "data": {"notes": "[not, an] array, \"quoted\""}},
+    [1e3, False],
+]
+
+
+def collect(parser, body: bytes, split_at=()):
+    """Items parsed from body delivered in chunks split at the given byte offsets"""
+    bounds = [0, *split_at, len(body)]
+    chunks = [body[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        return [item async for item in parser(stream())]
+    return asyncio.run(run())
+
+
+def test_json_array_any_single_split():
+    body = json.dumps(ITEMS, ensure_ascii=False).encode()
+
+    for split in range(1, len(body)):
+        assert collect(iter_json_array, body, [split]) == ITEMS, f"split at byte {split}"
+
+
+def test_json_array_byte_by_byte():
+    body = json.dumps(ITEMS, ensure_ascii=False, indent=2).encode()
+
+    assert collect(iter_json_array, body, range(1, len(body))) == ITEMS
+
+
+@pytest.mark.parametrize("chunks", [[b"[1.", b"5]"], [b"[1", b"2, 3]"], [b"[tr", b"ue]"], [b"[-", b"1e", b"3]"]])
+def test_json_array_number_split_across_chunks(chunks):
+    body = b"".join(chunks)
+    splits = [sum(len(chunk) for chunk in chunks[:i]) for i in range(1, len(chunks))]
+
+    assert collect(iter_json_array, body, splits) == json.loads(body)
+
+
+@pytest.mark.parametrize("body, message", [
+    (b'{"name": "x"}', "Body must be a JSON array or NDJSON"),
+    (b"[1, 2", "Unterminated JSON array"),
+    (b"[1 2]", "Expected ',' or ']' between array items"),
+    (b"[1] 2", "Unexpected data after the JSON array"),
+    (b'[{"name": ]', "Malformed or oversized item in the JSON array"),
+])
+def test_json_array_rejects_malformed_bodies(body, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        collect(iter_json_array, body, [len(body) // 2])
+
+
+def test_ndjson_any_single_split():
+    body = b"\n".join(orjson.dumps(item) for item in ITEMS) + b"\n\n"
+
+    for split in range(1, len(body)):
+        lines = collect(iter_ndjson, body, [split])
+        assert [orjson.loads(line) for line in lines] == ITEMS, f"split at byte {split}"
+
+
+def test_ndjson_last_line_without_newline():
+    body = b'{"a": "\xe2\x82\xb9"}\n{"b": 2}'
+
+    assert collect(iter_ndjson, body, [8, 9]) == [b'{"a": "\xe2\x82\xb9"}', b'{"b": 2}']
@@ -0,0 +1,86 @@
+"""GET /api/owners must cost the same number of database calls for any page size."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs if length is None else self.docs[:length]
+
+
+class FakeCollection:
+    """Collection stub recording find/aggregate calls in the shared calls list"""
+
+    def __init__(self, name, docs, calls):
+        self.name = name
+        self.docs = docs
+        self.calls = calls
+
+    def find(self, query=None, projection=None):
+        self.calls.append((self.name, "find"))
+        return FakeCursor([dict(doc) for doc in self.docs])
+
+    def aggregate(self, pipeline, **kwargs):
+        self.calls.append((self.name, "aggregate"))
+        owner_ids = pipeline[0]["$match"]["owner_id"]["$in"]
+        counts = {}
+        for doc in self.docs:
+            if doc["owner_id"] in owner_ids:
+                counts[doc["owner_id"]] = counts.get(doc["owner_id"], 0) + 1
+        return FakeCursor([{"_id": owner_id, "count": count} for owner_id, count in counts.items()])
+
+
+class FakeDatabase:
+    def __init__(self, owners: int):
+        self.calls = []
+        now = datetime.now(timezone.utc)
+        owner_docs = [
+            {"id": f"owner-{i}", "name": f"Owner {i}", "email": f"owner{i}@example.com", "phone": "9999999999",
+             "status": "active", "created_at": now - timedelta(minutes=i), "updated_at": now}
+            for i in range(owners)
+        ]
+        property_docs = [{"id": f"property-{i}", "owner_id": f"owner-{i % max(owners, 1)}"} for i in range(owners * 2)]
+        self.owners = FakeCollection("owners", owner_docs, self.calls)
+        self.properties = FakeCollection("properties", property_docs, self.calls)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    def client_for(owners: int):
+        fake_db = FakeDatabase(owners)
+        monkeypatch.setattr(server, "db", fake_db)
+        return TestClient(server.app), fake_db
+    return client_for
+
+
+@pytest.mark.parametrize("owners", [1, 100])
+def test_owner_list_database_calls_do_not_grow_with_page_size(api, owners):
+    client, fake_db = api(owners)
+
+    response = client.get("/api/owners", params={"limit": 100})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body) == owners
+    assert all(owner["property_count"] == 2 for owner in body)
+    assert fake_db.calls == [("owners", "find"), ("properties", "aggregate")]
+
+
+def test_owner_list_skips_property_counts_when_not_requested(api):
+    client, fake_db = api(100)
+
+    response = client.get("/api/owners", params={"fields": "name"})
+
+    assert response.status_code == 200
+    assert fake_db.calls == [("owners", "find")]
@@ -0,0 +1,30 @@
+"""Pagination cursors only continue the sort they were issued for."""
+
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from server import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trips_sort_key():
+    created_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor({"id": "property-1", "created_at": created_at})
+
+    assert decode_cursor(cursor) == (created_at, "property-1")
+
+
+@pytest.mark.parametrize("sort_field, direction", [("price_value", -1), ("area_sqft", 1)])
+def test_cursor_rejects_other_sort(sort_field, direction):
+    cursor = encode_cursor({"id": "property-1", "price_value": 15000}, "price_value", 1)
+
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, sort_field, direction)
+    assert error.value.status_code == 400
+
+
+def test_cursor_rejects_garbage():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not-a-cursor")
+    assert error.value.status_code == 400
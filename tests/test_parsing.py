@@ -0,0 +1,47 @@
+"""price_value / area_sqft parsing behind the indexed range filters and sorts."""
+
+import pytest
+
+from server import parse_area, parse_price
+
+
+@pytest.mark.parametrize("price, expected", [
+    ("₹25,000", 25000),
+    ("12,000", 12000),
+    ("₹1.2 Cr", 12_000_000),
+    ("45 Lakh", 4_500_000),
+    ("15k", 15000),
+    ("Rs. 18,000/month", 18000),
+    ("25000 per month", 25000),
+    ("2 BHK ₹15000", 15000),
+    ("2 BHK 15000", 15000),
+    ("2 BHK", None),
+    ("", None),
+])
+def test_parse_price(price, expected):
+    assert parse_price(price) == expected
+
+
+@pytest.mark.parametrize("area, expected", [
+    ("1,200 sq ft", 1200),
+    ("1100 sq.ft.", 1100),
+    ("1200", 1200),
+    ("150 sq yd", 1350),
+    ("90 sqm", 968.75),
+    ("1200 square feet", 1200),
+    ("1200 Sq. Feet", 1200),
+    ("1 square foot", 1),
+    ("100 sq mt", 1076.39),
+    ("100 sq. mtr", 1076.39),
+    ("100 square metres", 1076.39),
+    ("200 square yards", 1800),
+    ("1800 sqft", 1800),
+    ("950 sq", 950),
+    ("1 acre", 43560),
+    ("3 BHK 1500 sq. ft.", 1500),
+    ("3 BHK", None),
+    ("2 hectares", None),
+    (None, None),
+])
+def test_parse_area(area, expected):
+    assert parse_area(area) == expected
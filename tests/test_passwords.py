@@ -0,0 +1,23 @@
+"""The password pool must keep working when the app is driven from more than one event loop."""
+
+import asyncio
+import time
+
+import server
+
+
+def slow_check(value):
+    time.sleep(0.01)
+    return value
+
+
+async def check_many(count):
+    return await asyncio.gather(*(server.run_password_task(slow_check, i) for i in range(count)))
+
+
+def test_password_pool_queues_across_event_loops():
+    # More tasks than workers, so some have to wait on the semaphore in each loop
+    count = server.PASSWORD_HASH_WORKERS * 3
+
+    assert asyncio.run(check_many(count)) == list(range(count))
+    assert asyncio.run(check_many(count)) == list(range(count))